@@ -2,8 +2,13 @@ from flask import Flask
 from flask_cors import CORS
 from datetime import timedelta
 import os
+import json
 from dotenv import load_dotenv
 from extensions import db, jwt
+from lookup_filter import lookup_filter
+from rate_limit import rate_limiter
+from document_store import create_document_store
+from attestations import attestation_issuer
 
 load_dotenv()
 
@@ -17,24 +22,78 @@ app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-change-in
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
 
+# Negative-lookup filter for the public certificate routes
+app.config['LOOKUP_FILTER_ENABLED'] = os.getenv('LOOKUP_FILTER_ENABLED', 'true').lower() == 'true'
+app.config['LOOKUP_FILTER_CAPACITY'] = int(os.getenv('LOOKUP_FILTER_CAPACITY', '1000000'))
+app.config['LOOKUP_FILTER_FP_RATE'] = float(os.getenv('LOOKUP_FILTER_FP_RATE', '0.01'))
+app.config['LOOKUP_FILTER_SNAPSHOT'] = os.getenv('LOOKUP_FILTER_SNAPSHOT', os.path.join(os.path.dirname(__file__), 'lookup_filter.snapshot'))
+app.config['LOOKUP_FILTER_REFRESH_SECONDS'] = float(os.getenv('LOOKUP_FILTER_REFRESH_SECONDS', '1.0'))
+# Rows stay uncommitted while /issue waits for the chain; re-read rows this young on every refresh
+app.config['LOOKUP_FILTER_SETTLE_SECONDS'] = float(os.getenv(
+    'LOOKUP_FILTER_SETTLE_SECONDS', str(float(os.getenv('CONFIRMATION_TIMEOUT', '120')) + 60)
+))
+
+# Content-addressed certificate documents: file:///path or s3://bucket/prefix
+app.config['DOCUMENT_STORAGE_URL'] = os.getenv('DOCUMENT_STORAGE_URL', 'file://' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'documents'))
+app.config['MAX_DOCUMENT_SIZE'] = int(os.getenv('MAX_DOCUMENT_SIZE', str(512 * 1024 * 1024)))
+
+# Stored responses for retried POST /api/certificates/issue requests
+app.config['IDEMPOTENCY_KEY_TTL_HOURS'] = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', '24'))
+app.config['IDEMPOTENCY_WAIT_TIMEOUT'] = float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', '130'))
+# A key still in progress after this long belongs to a worker that died; outlasts GUNICORN_TIMEOUT
+app.config['IDEMPOTENCY_LEASE_SECONDS'] = int(os.getenv('IDEMPOTENCY_LEASE_SECONDS', str(int(os.getenv('GUNICORN_TIMEOUT', '180')) + 60)))
+
+# Largest POST /api/certificates/revoke request; it is sent on chain in REVOCATION_CHUNK_SIZE batches
+app.config['REVOCATION_MAX_CERTIFICATES'] = int(os.getenv('REVOCATION_MAX_CERTIFICATES', '1000'))
+
+# Signed attestations third parties verify offline; defaults to the blockchain account key
+app.config['ATTESTATION_ENABLED'] = os.getenv('ATTESTATION_ENABLED', 'true').lower() == 'true'
+app.config['ATTESTATION_PRIVATE_KEY'] = os.getenv('ATTESTATION_PRIVATE_KEY', os.getenv('PRIVATE_KEY', ''))
+app.config['ATTESTATION_TTL_SECONDS'] = int(os.getenv('ATTESTATION_TTL_SECONDS', str(7 * 24 * 3600)))
+app.config['ATTESTATION_CACHE_SIZE'] = int(os.getenv('ATTESTATION_CACHE_SIZE', '100000'))
+
+# Token bucket rate limits per endpoint, applied per client IP and per JWT identity
+app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+app.config['RATE_LIMIT_STORAGE_URL'] = os.getenv('RATE_LIMIT_STORAGE_URL', 'memory://')
+# Behind one reverse proxy (nginx.conf), key clients by the address it appends to X-Forwarded-For
+app.config['RATE_LIMIT_TRUST_PROXY'] = os.getenv('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true'
+app.config['RATE_LIMITS'] = {
+    'auth.login': '10/minute',
+    'auth.register': '5/minute',
+    'certificates.verify_certificate': '60/minute',
+    'certificates.get_shared_certificate': '60/minute',
+    **json.loads(os.getenv('RATE_LIMITS', '{}'))
+}
+
 # Initialize extensions with app
 db.init_app(app)
 jwt.init_app(app)
 CORS(app)
+rate_limiter.init_app(app)
+attestation_issuer.init_app(app)
+app.extensions['document_store'] = create_document_store(app.config['DOCUMENT_STORAGE_URL'])
 
 # Import models (after db initialization)
-from models import User, Certificate, ShareLink
+from models import User, Certificate, ShareLink, Document, IdempotencyKey
 
 # Register blueprints
 from routes.auth import auth_bp
 from routes.certificates import certificates_bp
+from routes.documents import documents_bp
 
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(certificates_bp, url_prefix='/api/certificates')
+app.register_blueprint(documents_bp, url_prefix='/api/documents')
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return {'status': 'healthy', 'message': 'Certificate Vault API is running'}, 200
+    from blockchain_utils import rpc_stats
+    return {
+        'status': 'healthy',
+        'message': 'Certificate Vault API is running',
+        'lookup_filter': lookup_filter.stats(),
+        'rpc_endpoints': rpc_stats()
+    }, 200
 
 def create_tables():
     with app.app_context():
@@ -43,6 +102,18 @@ def create_tables():
 # Create tables on startup
 create_tables()
 
+# Serving caches; offline tools (export, reconciliation) set STARTUP_TASKS_ENABLED=false
+app.config['STARTUP_TASKS_ENABLED'] = os.getenv('STARTUP_TASKS_ENABLED', 'true').lower() == 'true'
+
+if app.config['STARTUP_TASKS_ENABLED']:
+    # Build the lookup filter once the tables exist
+    lookup_filter.init_app(app)
+
+    # Load the on-chain revocation bitmap so revocation checks stay local
+    from blockchain_utils import sync_revocation_mirror
+    sync_revocation_mirror()
+
+# Development server only; production runs wsgi.py under gunicorn
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,124 @@
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from collections import OrderedDict
+from datetime import datetime
+import base64
+import calendar
+import json
+import threading
+import time
+
+from blockchain_utils import get_anchor_info, CONTRACT_ADDRESS, CONTRACT_VERSION
+from revocation import revocation_mirror
+
+# Bumped whenever the claim set changes; verifiers reject versions they don't know
+ATTESTATION_VERSION = 1
+SIGNATURE_SCHEME = 'eip191-secp256k1'
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+class AttestationIssuer:
+    """Signed, offline-checkable statements that a certificate is anchored and not revoked
+
+    A token is base64url(claims JSON) "." base64url(signature), where the
+    signature is an EIP-191 personal_sign over the claims bytes. Anyone who
+    knows the signer address can check it without calling the API; the
+    revocation epoch in the claims lets them skip the chain lookup while the
+    contract's epoch is unchanged. Tokens are cached per certificate and
+    re-signed once they enter the last quarter of their lifetime.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.account = None
+        self.ttl = 7 * 24 * 3600
+        self.max_entries = 100000
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if not app.config.get('ATTESTATION_ENABLED', True):
+            return
+
+        private_key = app.config.get('ATTESTATION_PRIVATE_KEY')
+        if not private_key:
+            print("Warning: ATTESTATION_PRIVATE_KEY not set. Signed attestations are disabled.")
+            return
+
+        self.account = Account.from_key(private_key)
+        self.ttl = app.config.get('ATTESTATION_TTL_SECONDS', self.ttl)
+        self.max_entries = app.config.get('ATTESTATION_CACHE_SIZE', self.max_entries)
+        self.enabled = True
+
+    @property
+    def signer(self):
+        return self.account.address if self.account else None
+
+    def public_key_info(self):
+        """What verifiers need to check tokens offline"""
+        return {
+            'signer': self.signer,
+            'scheme': SIGNATURE_SCHEME,
+            'version': ATTESTATION_VERSION,
+            'contract_address': CONTRACT_ADDRESS or None,
+            'contract_version': CONTRACT_VERSION
+        }
+
+    def get(self, certificate):
+        """Cached attestation for a confirmed, unrevoked certificate: (token, claims)"""
+        now = int(time.time())
+        with self._lock:
+            entry = self._cache.get(certificate.certificate_id)
+            if entry:
+                self._cache.move_to_end(certificate.certificate_id)
+
+        if entry and entry['claims']['exp'] - now > self.ttl // 4:
+            return entry['token'], entry['claims']
+
+        # The anchoring block never changes, so a refresh only re-signs
+        anchor = entry['anchor'] if entry else get_anchor_info(certificate.blockchain_tx_hash)
+        claims = self._claims(certificate, anchor, now)
+        token = self._sign(claims)
+
+        with self._lock:
+            self._cache[certificate.certificate_id] = {'token': token, 'claims': claims, 'anchor': anchor}
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        return token, claims
+
+    def invalidate(self, *certificate_ids):
+        with self._lock:
+            for certificate_id in certificate_ids:
+                self._cache.pop(certificate_id, None)
+
+    def _claims(self, certificate, anchor, now):
+        expires = now + self.ttl
+        if certificate.expiration_date:
+            # Never vouch for a certificate past its own expiration date
+            certificate_end = calendar.timegm(datetime.combine(certificate.expiration_date, datetime.max.time()).timetuple())
+            expires = min(expires, certificate_end)
+
+        return {
+            'v': ATTESTATION_VERSION,
+            'certificate_id': certificate.certificate_id,
+            'certificate_hash': certificate.certificate_hash,
+            'tx_hash': certificate.blockchain_tx_hash,
+            'block_number': anchor['block_number'],
+            'chain_id': anchor['chain_id'],
+            'contract': CONTRACT_ADDRESS or None,
+            'contract_version': CONTRACT_VERSION,
+            'serial': certificate.chain_serial,
+            'revocation_epoch': revocation_mirror.epoch,
+            'iat': now,
+            'exp': expires
+        }
+
+    def _sign(self, claims):
+        payload = json.dumps(claims, sort_keys=True, separators=(',', ':')).encode()
+        signature = self.account.sign_message(encode_defunct(primitive=payload)).signature
+        return f"{_b64encode(payload)}.{_b64encode(bytes(signature))}"
+
+# Process-wide issuer shared by the routes
+attestation_issuer = AttestationIssuer()
@@ -1,27 +1,73 @@
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
+from web3.logs import DISCARD
 import hashlib
 import json
 import os
 from dotenv import load_dotenv
+from revocation import revocation_mirror
+from confirmations import ConfirmationTracker
+from fee_oracle import FeeOracle, GasEstimator
+from rpc_pool import create_provider
+from nonces import NonceAllocator, create_nonce_store
 
 load_dotenv()
 
 # Blockchain configuration
 ETHEREUM_RPC_URL = os.getenv('ETHEREUM_RPC_URL', 'http://localhost:8545')
+# Comma-separated list; reads are balanced and hedged across all of them
+ETHEREUM_RPC_URLS = [url.strip() for url in os.getenv('ETHEREUM_RPC_URLS', ETHEREUM_RPC_URL).split(',') if url.strip()]
+RPC_TIMEOUT = float(os.getenv('RPC_TIMEOUT', '10'))
+RPC_HEDGE_ENABLED = os.getenv('RPC_HEDGE_ENABLED', 'true').lower() == 'true'
+RPC_HEDGE_DEFAULT_DELAY = float(os.getenv('RPC_HEDGE_DEFAULT_DELAY', '0.2'))
 CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS', '')
 PRIVATE_KEY = os.getenv('PRIVATE_KEY', '')
 ACCOUNT_ADDRESS = os.getenv('ACCOUNT_ADDRESS', '')
 
+# Confirmation tracking
+CONFIRMATION_DEPTH = int(os.getenv('CONFIRMATION_DEPTH', '1'))
+CONFIRMATION_TIMEOUT = float(os.getenv('CONFIRMATION_TIMEOUT', '120'))
+CONFIRMATION_POLL_INTERVAL = float(os.getenv('CONFIRMATION_POLL_INTERVAL', '1.0'))
+
+# Fee suggestions and gas limits
+FEE_REFRESH_INTERVAL = float(os.getenv('FEE_REFRESH_INTERVAL', '12'))
+FEE_PRIORITY_PERCENTILE = int(os.getenv('FEE_PRIORITY_PERCENTILE', '50'))
+GAS_LIMIT_MARGIN = float(os.getenv('GAS_LIMIT_MARGIN', '1.2'))
+
+# Serials per revokeCertificates transaction; 500 keeps the gas limit near 12.6M, well under a 30M block
+REVOCATION_CHUNK_SIZE = int(os.getenv('REVOCATION_CHUNK_SIZE', '500'))
+
+# Nonce allocation: file:// serializes the workers of one host, redis:// every host
+NONCE_STORAGE_URL = os.getenv('NONCE_STORAGE_URL', 'file://' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nonce.lock'))
+NONCE_RESYNC_SECONDS = float(os.getenv('NONCE_RESYNC_SECONDS', '60'))
+
 # Initialize Web3
-w3 = Web3(Web3.HTTPProvider(ETHEREUM_RPC_URL))
+w3 = Web3(create_provider(
+    ETHEREUM_RPC_URLS,
+    timeout=RPC_TIMEOUT,
+    hedge=RPC_HEDGE_ENABLED,
+    default_hedge_delay=RPC_HEDGE_DEFAULT_DELAY
+))
 
 # Add PoA middleware if needed (for networks like Goerli, Mumbai, etc.)
-if 'goerli' in ETHEREUM_RPC_URL.lower() or 'mumbai' in ETHEREUM_RPC_URL.lower():
+if any('goerli' in url.lower() or 'mumbai' in url.lower() for url in ETHEREUM_RPC_URLS):
     w3.middleware_onion.inject(geth_poa_middleware, layer=0)
 
+# One block-following loop confirms every transaction this process sends
+confirmation_tracker = ConfirmationTracker(w3, depth=CONFIRMATION_DEPTH, poll_interval=CONFIRMATION_POLL_INTERVAL)
+
+# Transaction building reads fees and gas limits from memory instead of the node
+fee_oracle = FeeOracle(w3, refresh_interval=FEE_REFRESH_INTERVAL, priority_percentile=FEE_PRIORITY_PERCENTILE)
+gas_estimator = GasEstimator(margin=GAS_LIMIT_MARGIN)
+
+# Every send from ACCOUNT_ADDRESS takes its nonce from here
+nonce_allocator = NonceAllocator(w3, ACCOUNT_ADDRESS, create_nonce_store(NONCE_STORAGE_URL), resync_after=NONCE_RESYNC_SECONDS)
+
 # Load contract ABI from deployment file if available
 CONTRACT_ABI = None
+# 1 = string-keyed CertificateVerification, 2 = bytes32-keyed CertificateVerificationV2
+CONTRACT_VERSION = 1
+CONTRACT_DEPLOY_BLOCK = 0
 CONTRACT_INFO_PATH = os.path.join(os.path.dirname(__file__), '..', 'contracts', 'contract_info.json')
 
 try:
@@ -29,6 +75,8 @@ try:
         with open(CONTRACT_INFO_PATH, 'r') as f:
             contract_info = json.load(f)
             CONTRACT_ABI = contract_info.get('abi')
+            CONTRACT_VERSION = contract_info.get('version', 1)
+            CONTRACT_DEPLOY_BLOCK = contract_info.get('block_number', 0)
             if not CONTRACT_ADDRESS:
                 CONTRACT_ADDRESS = contract_info.get('address', '')
 except Exception as e:
@@ -76,41 +124,164 @@ if not CONTRACT_ABI:
             "stateMutability": "view",
             "type": "function"
         },
+        {
+            "inputs": [
+                {"internalType": "string", "name": "_hash", "type": "string"}
+            ],
+            "name": "checkCertificate",
+            "outputs": [
+                {"internalType": "bool", "name": "exists", "type": "bool"},
+                {"internalType": "bool", "name": "revoked", "type": "bool"},
+                {"internalType": "uint256", "name": "serial", "type": "uint256"}
+            ],
+            "stateMutability": "view",
+            "type": "function"
+        },
+        {
+            "inputs": [
+                {"internalType": "uint256[]", "name": "_serials", "type": "uint256[]"}
+            ],
+            "name": "revokeCertificates",
+            "outputs": [],
+            "stateMutability": "nonpayable",
+            "type": "function"
+        },
+        {
+            "inputs": [
+                {"internalType": "uint256", "name": "_wordIndex", "type": "uint256"}
+            ],
+            "name": "getRevocationWord",
+            "outputs": [
+                {"internalType": "uint256", "name": "", "type": "uint256"}
+            ],
+            "stateMutability": "view",
+            "type": "function"
+        },
+        {
+            "inputs": [],
+            "name": "revocationEpoch",
+            "outputs": [
+                {"internalType": "uint256", "name": "", "type": "uint256"}
+            ],
+            "stateMutability": "view",
+            "type": "function"
+        },
+        {
+            "inputs": [],
+            "name": "getTotalCertificates",
+            "outputs": [
+                {"internalType": "uint256", "name": "", "type": "uint256"}
+            ],
+            "stateMutability": "view",
+            "type": "function"
+        },
         {
             "anonymous": False,
             "inputs": [
                 {"indexed": True, "internalType": "string", "name": "certificateId", "type": "string"},
                 {"indexed": True, "internalType": "string", "name": "hash", "type": "string"},
-                {"indexed": False, "internalType": "string", "name": "studentName", "type": "string"}
+                {"indexed": False, "internalType": "string", "name": "studentName", "type": "string"},
+                {"indexed": False, "internalType": "uint256", "name": "serial", "type": "uint256"}
             ],
             "name": "CertificateIssued",
             "type": "event"
+        },
+        {
+            "anonymous": False,
+            "inputs": [
+                {"indexed": True, "internalType": "uint256", "name": "epoch", "type": "uint256"},
+                {"indexed": False, "internalType": "uint256[]", "name": "serials", "type": "uint256[]"}
+            ],
+            "name": "CertificatesRevoked",
+            "type": "event"
         }
     ]
 
+_contract = None
+
 def get_contract():
     """Get the contract instance"""
+    global _contract
+    
     if not CONTRACT_ADDRESS:
         raise ValueError("CONTRACT_ADDRESS not set in environment variables")
     
-    if not w3.is_connected():
-        raise ConnectionError("Cannot connect to Ethereum network")
-    
-    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
-    return contract
+    # Built once per process; later calls make no connectivity round trip
+    if _contract is None:
+        if not w3.is_connected():
+            raise ConnectionError("Cannot connect to Ethereum network")
+        
+        _contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    return _contract
+
+def contract_hash_arg(certificate_hash):
+    """Encode a hex certificate hash the way the deployed contract version expects"""
+    if CONTRACT_VERSION >= 2:
+        return bytes.fromhex(certificate_hash[2:] if certificate_hash.startswith('0x') else certificate_hash)
+    return certificate_hash
+
+def certificate_hash_topic(certificate_hash):
+    """Log topic under which CertificateIssued indexes a certificate hash"""
+    if CONTRACT_VERSION >= 2:
+        # bytes32 is indexed as-is
+        return contract_hash_arg(certificate_hash)
+    # Indexed strings are stored as the keccak of their value
+    return bytes(Web3.keccak(text=certificate_hash))
 
-def calculate_certificate_hash(student_name, course_name, issue_date, issuer_id, owner_id):
+def calculate_certificate_hash(student_name, course_name, issue_date, issuer_id, owner_id, document_hash=None):
     """Calculate SHA-256 hash of certificate data"""
     data_string = f"{student_name}|{course_name}|{issue_date}|{issuer_id}|{owner_id}"
+    # Anchors the attached document; certificates without one keep their original hash
+    if document_hash:
+        data_string += f"|{document_hash}"
     return hashlib.sha256(data_string.encode()).hexdigest()
 
-def store_certificate_on_blockchain(certificate_id, certificate_hash, student_name, course_name, issue_date):
-    """Store certificate hash on blockchain"""
+def build_transaction(call, nonce, gas=None):
+    """Build a contract transaction from cached fees and gas limits"""
+    return call.build_transaction({
+        'from': ACCOUNT_ADDRESS,
+        'nonce': nonce,
+        'gas': gas or gas_estimator.gas_for(call, ACCOUNT_ADDRESS),
+        **fee_oracle.fee_params()
+    })
+
+def send_transaction(call, gas=None, on_resolved=None, timeout=CONFIRMATION_TIMEOUT):
+    """Build, sign and send a contract call, then wait for the confirmation tracker to resolve it
+    
+    The nonce stays reserved until the node has accepted the transaction,
+    so concurrent sends from any thread or worker never share one.
+    Raises ConfirmationTimeout if the transaction is still unconfirmed after
+    `timeout` seconds; on_resolved(pending) still runs once it resolves.
+    """
+    with nonce_allocator.next_nonce() as nonce:
+        transaction = build_transaction(call, nonce, gas=gas)
+        signed_txn = w3.eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
+        # Read before sending so the tracker also scans blocks mined before track()
+        submitted_block = w3.eth.block_number
+        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    
+    pending = confirmation_tracker.track(
+        tx_hash,
+        sender=ACCOUNT_ADDRESS,
+        nonce=nonce,
+        callback=on_resolved,
+        submitted_block=submitted_block
+    )
+    return pending.wait(timeout)
+
+def issued_serial(receipt):
+    """Serial the contract assigned, read from the CertificateIssued event in a receipt"""
+    for event in get_contract().events.CertificateIssued().process_receipt(receipt, errors=DISCARD):
+        return event['args']['serial']
+    return None
+
+def store_certificate_on_blockchain(certificate_id, certificate_hash, student_name, course_name, issue_date, on_resolved=None):
+    """Store certificate hash on blockchain; returns (tx hash, chain serial)"""
     try:
         if not CONTRACT_ADDRESS:
             # For development/testing without blockchain
             print("Warning: CONTRACT_ADDRESS not set. Certificate not stored on blockchain.")
-            return "0x" + "0" * 64  # Mock transaction hash
+            return "0x" + "0" * 64, None  # Mock transaction hash
         
         contract = get_contract()
         
@@ -118,57 +289,162 @@ def store_certificate_on_blockchain(certificate_id, certificate_hash, student_na
             raise ValueError("PRIVATE_KEY and ACCOUNT_ADDRESS must be set for blockchain transactions")
         
         # Build transaction
-        nonce = w3.eth.get_transaction_count(ACCOUNT_ADDRESS)
-        
-        transaction = contract.functions.issueCertificate(
-            certificate_id,
-            certificate_hash,
-            student_name,
-            course_name,
-            issue_date
-        ).build_transaction({
-            'from': ACCOUNT_ADDRESS,
-            'nonce': nonce,
-            'gas': 200000,
-            'gasPrice': w3.eth.gas_price
-        })
-        
-        # Sign transaction
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
-        
-        # Send transaction
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        if CONTRACT_VERSION >= 2:
+            call = contract.functions.issueCertificate(
+                contract_hash_arg(certificate_hash),
+                certificate_id,
+                student_name,
+                course_name,
+                issue_date
+            )
+        else:
+            call = contract.functions.issueCertificate(
+                certificate_id,
+                certificate_hash,
+                student_name,
+                course_name,
+                issue_date
+            )
         
-        # Wait for transaction receipt
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        # Sign, send and wait for confirmation
+        receipt = send_transaction(call, on_resolved=on_resolved)
         
-        if receipt.status == 1:
-            return receipt.transactionHash.hex()
-        else:
-            raise Exception("Transaction failed on blockchain")
+        return Web3.to_hex(receipt['transactionHash']), issued_serial(receipt)
     
     except Exception as e:
         print(f"Error storing certificate on blockchain: {str(e)}")
         raise
 
+def check_certificate_on_blockchain(certificate_hash):
+    """Check issuance and revocation of a certificate hash in a single call"""
+    if not CONTRACT_ADDRESS:
+        # For development/testing without blockchain
+        print("Warning: CONTRACT_ADDRESS not set. Cannot verify on blockchain.")
+        return {'exists': False, 'revoked': False, 'serial': None}
+    
+    contract = get_contract()
+    
+    exists, revoked, serial = contract.functions.checkCertificate(contract_hash_arg(certificate_hash)).call()
+    
+    if revoked:
+        revocation_mirror.mark_revoked([serial])
+    
+    return {
+        'exists': exists,
+        'revoked': revoked,
+        'serial': serial if exists else None
+    }
+
+def get_anchor_info(tx_hash):
+    """Chain id and block number of a certificate's issuing transaction"""
+    if not CONTRACT_ADDRESS:
+        # For development/testing without blockchain
+        return {'chain_id': None, 'block_number': 0}
+
+    receipt = w3.eth.get_transaction_receipt(tx_hash)
+    if receipt['status'] != 1:
+        raise ValueError(f"Transaction {tx_hash} did not succeed")
+
+    return {
+        'chain_id': fee_oracle.chain_id or w3.eth.chain_id,
+        'block_number': receipt['blockNumber']
+    }
+
 def verify_certificate_on_blockchain(certificate_hash):
     """Verify certificate hash on blockchain"""
+    try:
+        result = check_certificate_on_blockchain(certificate_hash)
+        return result['exists'] and not result['revoked']
+    
+    except Exception as e:
+        print(f"Error verifying certificate on blockchain: {str(e)}")
+        return False
+
+def revocation_chunks(serials):
+    """Split serials into sorted batches small enough to fit in one transaction each"""
+    serials = sorted(set(serials))
+    return [serials[i:i + REVOCATION_CHUNK_SIZE] for i in range(0, len(serials), REVOCATION_CHUNK_SIZE)]
+
+def revoke_certificates_on_blockchain(serials):
+    """Revoke a batch of certificate serials in one transaction
+    
+    Batches larger than REVOCATION_CHUNK_SIZE may not fit in a block; split
+    them with revocation_chunks first.
+    """
+    if len(set(serials)) > REVOCATION_CHUNK_SIZE:
+        raise ValueError(f"At most {REVOCATION_CHUNK_SIZE} serials can be revoked in one transaction")
+    
     try:
         if not CONTRACT_ADDRESS:
             # For development/testing without blockchain
-            print("Warning: CONTRACT_ADDRESS not set. Cannot verify on blockchain.")
-            return False
+            print("Warning: CONTRACT_ADDRESS not set. Revocation not stored on blockchain.")
+            revocation_mirror.mark_revoked(serials)
+            return "0x" + "0" * 64  # Mock transaction hash
         
         contract = get_contract()
         
-        # Call the verify function
-        is_verified = contract.functions.verifyCertificate(certificate_hash).call()
+        if not PRIVATE_KEY or not ACCOUNT_ADDRESS:
+            raise ValueError("PRIVATE_KEY and ACCOUNT_ADDRESS must be set for blockchain transactions")
+        
+        # Sorted serials let the contract write each bitmap word once
+        serials = sorted(set(serials))
+        
+        # Gas grows with the number of fresh bitmap words, so it is sized per call
+        receipt = send_transaction(
+            contract.functions.revokeCertificates(serials),
+            gas=60000 + 25000 * len(serials)
+        )
         
-        return is_verified
+        epoch = None
+        for event in contract.events.CertificatesRevoked().process_receipt(receipt):
+            epoch = event['args']['epoch']
+        revocation_mirror.mark_revoked(serials, epoch=epoch)
+        
+        return Web3.to_hex(receipt['transactionHash'])
     
     except Exception as e:
-        print(f"Error verifying certificate on blockchain: {str(e)}")
-        return False
+        print(f"Error revoking certificates on blockchain: {str(e)}")
+        raise
+
+def rpc_stats():
+    """Per-endpoint latency and error rate when several RPC URLs are configured"""
+    stats = getattr(w3.provider, 'stats', None)
+    return stats() if stats else None
+
+def sync_revocation_mirror():
+    """Load the on-chain revocation bitmap into the local mirror"""
+    try:
+        if not CONTRACT_ADDRESS:
+            return None
+        
+        return revocation_mirror.sync(get_contract())
+    
+    except Exception as e:
+        print(f"Warning: Could not sync revocation bitmap: {str(e)}")
+        return None
+
+def _get_certificate_v2(contract, certificate_hash):
+    """Read the packed record, then the descriptive fields from the issuance event"""
+    issuer, timestamp, serial, revoked = contract.functions.getCertificate(contract_hash_arg(certificate_hash)).call()
+    
+    events = contract.events.CertificateIssued().get_logs(
+        argument_filters={'hash': contract_hash_arg(certificate_hash)},
+        fromBlock=CONTRACT_DEPLOY_BLOCK
+    )
+    if not events:
+        return None
+    args = events[0]['args']
+    
+    return {
+        'certificate_id': args['certificateId'],
+        'student_name': args['studentName'],
+        'course_name': args['courseName'],
+        'issue_date': args['issueDate'],
+        'timestamp': timestamp,
+        'issuer': issuer,
+        'serial': serial,
+        'revoked': revoked
+    }
 
 def get_certificate_from_blockchain(certificate_hash):
     """Get certificate data from blockchain"""
@@ -178,6 +454,9 @@ def get_certificate_from_blockchain(certificate_hash):
         
         contract = get_contract()
         
+        if CONTRACT_VERSION >= 2:
+            return _get_certificate_v2(contract, certificate_hash)
+        
         # Call the getCertificate function
         result = contract.functions.getCertificate(certificate_hash).call()
         
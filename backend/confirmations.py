@@ -0,0 +1,210 @@
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+import threading
+import time
+
+class ConfirmationTimeout(Exception):
+    """The transaction was sent but not confirmed within the wait timeout"""
+
+    def __init__(self, tx_hash):
+        super().__init__(f"Transaction {tx_hash} not confirmed yet")
+        self.tx_hash = tx_hash
+
+class TransactionFailed(Exception):
+    """The transaction reverted, was replaced or was dropped"""
+
+class PendingTransaction:
+    def __init__(self, tx_hash, sender, nonce, submitted_block, callback):
+        self.tx_hash = tx_hash
+        self.sender = sender
+        self.nonce = nonce
+        self.submitted_block = submitted_block
+        self.callback = callback
+        self.included_block = None
+        self.included_block_hash = None
+        self.receipt = None
+        self.status = 'pending'
+        self.error = None
+        self._done = threading.Event()
+
+    def resolve(self, status, receipt=None, error=None):
+        self.status = status
+        self.receipt = receipt
+        self.error = error
+        self._done.set()
+        if self.callback:
+            try:
+                self.callback(self)
+            except Exception as e:
+                print(f"Error in confirmation callback for {self.tx_hash}: {str(e)}")
+
+    def wait(self, timeout=None):
+        """Block until resolved; returns the receipt of a confirmed transaction"""
+        if not self._done.wait(timeout):
+            raise ConfirmationTimeout(self.tx_hash)
+        if self.status != 'confirmed':
+            raise TransactionFailed(f"Transaction {self.tx_hash} {self.status}: {self.error}")
+        return self.receipt
+
+class ConfirmationTracker:
+    """Resolves every outstanding transaction from one loop that follows block heads
+
+    Each new block costs one eth_getBlockByNumber, one receipts lookup for the
+    tracked transactions it contains and one nonce lookup per sender, so RPC
+    load follows the block rate rather than the number of pending
+    transactions.
+    """
+
+    def __init__(self, w3, depth=1, poll_interval=1.0, drop_after_blocks=50):
+        self.w3 = w3
+        self.depth = max(depth, 1)
+        self.poll_interval = poll_interval
+        self.drop_after_blocks = drop_after_blocks
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._last_block = None
+        self._block_receipts_supported = True
+
+    def track(self, tx_hash, sender=None, nonce=None, callback=None, submitted_block=None):
+        """Start tracking a sent transaction; callback(pending) runs once it resolves
+
+        submitted_block should be the head read before the transaction was
+        sent, so blocks mined in between are scanned for it.
+        """
+        tx_hash = Web3.to_hex(tx_hash)
+        with self._lock:
+            if submitted_block is None:
+                submitted_block = self._last_block if self._last_block is not None else self.w3.eth.block_number
+            pending = PendingTransaction(tx_hash, sender, nonce, submitted_block, callback)
+            self._pending[tx_hash] = pending
+            # Started lazily so preforking servers never fork a running thread
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='confirmation-tracker', daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return pending
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def _remove(self, pending):
+        with self._lock:
+            self._pending.pop(pending.tx_hash, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._last_block = None
+                    self._wakeup.wait()
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"Error following blocks for confirmations: {str(e)}")
+            time.sleep(self.poll_interval)
+
+    def _poll(self):
+        head = self.w3.eth.block_number
+        if self._last_block is None:
+            # Transactions may have been mined between submission and the first poll
+            self._last_block = min(p.submitted_block for p in list(self._pending.values())) - 1
+
+        for number in range(self._last_block + 1, head + 1):
+            self._scan_block(number)
+            self._last_block = number
+
+        self._confirm(head)
+        self._detect_replaced(head)
+
+    def _scan_block(self, number):
+        block = self.w3.eth.get_block(number)
+        included = []
+        for tx in block['transactions']:
+            pending = self._pending.get(Web3.to_hex(tx))
+            if pending and pending.included_block is None:
+                pending.included_block = number
+                pending.included_block_hash = block['hash']
+                included.append(pending)
+
+        if included:
+            receipts = self._receipts(number, [p.tx_hash for p in included])
+            for pending in included:
+                pending.receipt = receipts.get(pending.tx_hash)
+
+    def _receipts(self, number, tx_hashes):
+        """Receipts for the given transactions in one block, in bulk when the node allows"""
+        get_block_receipts = getattr(self.w3.eth, 'get_block_receipts', None)
+        if self._block_receipts_supported and get_block_receipts and len(tx_hashes) > 1:
+            try:
+                wanted = set(tx_hashes)
+                return {
+                    Web3.to_hex(receipt['transactionHash']): receipt
+                    for receipt in get_block_receipts(number)
+                    if Web3.to_hex(receipt['transactionHash']) in wanted
+                }
+            except Exception:
+                # Node without eth_getBlockReceipts
+                self._block_receipts_supported = False
+        return {tx_hash: self.w3.eth.get_transaction_receipt(tx_hash) for tx_hash in tx_hashes}
+
+    def _confirm(self, head):
+        canonical = {}
+        for pending in list(self._pending.values()):
+            if pending.included_block is None or head - pending.included_block + 1 < self.depth:
+                continue
+
+            if self.depth > 1:
+                number = pending.included_block
+                if number not in canonical:
+                    canonical[number] = self.w3.eth.get_block(number)['hash']
+                if canonical[number] != pending.included_block_hash:
+                    # Reorged out; look the transaction up again directly
+                    self._relocate(pending)
+                    continue
+
+            self._remove(pending)
+            if pending.receipt is not None and pending.receipt['status'] == 1:
+                pending.resolve('confirmed', pending.receipt)
+            else:
+                pending.resolve('failed', pending.receipt, 'reverted')
+
+    def _relocate(self, pending):
+        """Look the transaction's receipt up directly; returns whether it is mined"""
+        pending.included_block = None
+        pending.included_block_hash = None
+        pending.receipt = None
+        try:
+            receipt = self.w3.eth.get_transaction_receipt(pending.tx_hash)
+        except TransactionNotFound:
+            return False
+        pending.included_block = receipt['blockNumber']
+        pending.included_block_hash = receipt['blockHash']
+        pending.receipt = receipt
+        return True
+
+    def _detect_replaced(self, head):
+        waiting = [p for p in list(self._pending.values()) if p.included_block is None]
+        nonces = {}
+        for pending in waiting:
+            if pending.sender and pending.nonce is not None:
+                if pending.sender not in nonces:
+                    nonces[pending.sender] = self.w3.eth.get_transaction_count(pending.sender, head)
+                if pending.nonce < nonces[pending.sender]:
+                    # Mined in a block scanned before it was tracked, or
+                    # another transaction with the same nonce was mined
+                    if self._relocate(pending):
+                        continue
+                    self._remove(pending)
+                    pending.resolve('replaced', error='nonce used by another transaction')
+                    continue
+
+            if head - pending.submitted_block > self.drop_after_blocks:
+                try:
+                    self.w3.eth.get_transaction(pending.tx_hash)
+                except TransactionNotFound:
+                    if self._relocate(pending):
+                        continue
+                    self._remove(pending)
+                    pending.resolve('dropped', error='no longer known to the node')
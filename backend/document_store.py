@@ -0,0 +1,107 @@
+import hashlib
+import os
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+class DocumentTooLarge(Exception):
+    pass
+
+def _spool(stream, directory, max_size):
+    """Copy a stream to a temporary file in chunks, hashing it on the way"""
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise DocumentTooLarge(f"Document exceeds the {max_size} byte limit")
+                digest.update(chunk)
+                f.write(chunk)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return digest.hexdigest(), size, tmp_path
+
+class LocalDocumentStore:
+    """Content-addressed documents on local disk, sharded by digest prefix"""
+
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path_for(digest))
+
+    def put_stream(self, stream, max_size=None):
+        """Store a document without buffering it in memory; returns (digest, size)"""
+        digest, size, tmp_path = _spool(stream, self.tmp_dir, max_size)
+        path = self.path_for(digest)
+
+        if os.path.exists(path):
+            # Identical content is already stored
+            os.unlink(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+        return digest, size
+
+class S3DocumentStore:
+    """Content-addressed documents in an S3-compatible object store"""
+
+    def __init__(self, bucket, prefix='', tmp_dir=None):
+        try:
+            import boto3
+        except ImportError:
+            raise ImportError("The boto3 package is required for DOCUMENT_STORAGE_URL=s3://...")
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.tmp_dir = tmp_dir or tempfile.gettempdir()
+        self._client = boto3.client('s3')
+
+    def key_for(self, digest):
+        return f'{self.prefix}{digest[:2]}/{digest}'
+
+    def exists(self, digest):
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self.key_for(digest))
+            return True
+        except self._client.exceptions.ClientError:
+            return False
+
+    def put_stream(self, stream, max_size=None):
+        # The key is the digest, so the upload is spooled to disk until hashing finishes
+        digest, size, tmp_path = _spool(stream, self.tmp_dir, max_size)
+        try:
+            if not self.exists(digest):
+                self._client.upload_file(tmp_path, self.bucket, self.key_for(digest))
+        finally:
+            os.unlink(tmp_path)
+        return digest, size
+
+    def presigned_url(self, digest, expires_in=300):
+        return self._client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': self.key_for(digest)},
+            ExpiresIn=expires_in
+        )
+
+def create_document_store(url):
+    """Build a document store from a storage URL"""
+    if url.startswith('s3://'):
+        bucket, _, prefix = url[len('s3://'):].partition('/')
+        return S3DocumentStore(bucket, prefix.rstrip('/') + '/' if prefix else '')
+    if url.startswith('file://'):
+        return LocalDocumentStore(url[len('file://'):])
+    raise ValueError(f"Unsupported DOCUMENT_STORAGE_URL: {url}")
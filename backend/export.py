@@ -0,0 +1,78 @@
+from models import Certificate
+import csv
+import io
+import json
+import zlib
+
+EXPORT_FIELDS = [
+    'id', 'certificate_id', 'owner_id', 'issuer_id', 'student_name', 'course_name',
+    'issue_date', 'expiration_date', 'certificate_hash', 'blockchain_tx_hash',
+    'blockchain_status', 'is_revoked', 'created_at'
+]
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson')
+}
+
+def iter_certificate_rows(issuer_id=None, after_id=0, chunk_size=1000):
+    """Yield export rows in id order from a server-side cursor
+
+    Rows are fetched chunk_size at a time, so memory stays constant no matter
+    how many certificates are exported. after_id resumes a previous export.
+    """
+    columns = [getattr(Certificate, field) for field in EXPORT_FIELDS]
+    query = Certificate.query.with_entities(*columns).filter(Certificate.id > (after_id or 0))
+    if issuer_id is not None:
+        query = query.filter(Certificate.issuer_id == issuer_id)
+
+    query = query.order_by(Certificate.id).execution_options(stream_results=True).yield_per(chunk_size)
+    for row in query:
+        yield {
+            field: value.isoformat() if hasattr(value, 'isoformat') else value
+            for field, value in zip(EXPORT_FIELDS, row)
+        }
+
+def iter_csv(rows, chunk_size=1000):
+    """Encode rows as CSV, yielding one chunk per chunk_size rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def iter_ndjson(rows, chunk_size=1000):
+    """Encode rows as newline-delimited JSON, yielding one chunk per chunk_size rows"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row))
+        if len(lines) == chunk_size:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines = []
+
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
+
+def iter_gzip(chunks):
+    """Compress a stream of byte chunks into a single gzip member on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def iter_export(export_format, issuer_id=None, after_id=0, compress=False, chunk_size=1000):
+    """Stream an export as encoded (and optionally gzip-compressed) byte chunks"""
+    rows = iter_certificate_rows(issuer_id=issuer_id, after_id=after_id, chunk_size=chunk_size)
+    encode = iter_csv if export_format == 'csv' else iter_ndjson
+    chunks = encode(rows, chunk_size=chunk_size)
+    return iter_gzip(chunks) if compress else chunks
@@ -0,0 +1,59 @@
+# Gunicorn configuration for production serving
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Graceful reload: `kill -HUP <master>` replaces workers after they finish
+# in-flight requests. Because the app is preloaded in the master, new code
+# needs a master upgrade: `kill -USR2 <master>` starts a new master next to
+# the old one, then `kill -WINCH <old>` and `kill -QUIT <old>` retire it.
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+pidfile = os.getenv('GUNICORN_PIDFILE', '/tmp/gunicorn.pid')
+
+# Workers and threads: issuance waits on chain confirmation, so threaded
+# workers keep a slow request from holding a whole process
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Import the app once in the master; workers share its memory (lookup
+# filter, revocation mirror, ABI) copy-on-write
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '180'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '60'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+
+accesslog = '-'
+errorlog = '-'
+
+def post_fork(server, worker):
+    # Connections opened by the master must not be shared between processes
+    from app import app
+    from extensions import db
+    with app.app_context():
+        db.engine.dispose()
+
+    # Likewise for keep-alive RPC sessions web3 cached during preload
+    try:
+        from web3._utils import request as web3_request
+        web3_request._session_cache.clear()
+    except Exception:
+        pass
+
+    # The RPC pool's hedging threads stayed behind in the master
+    from blockchain_utils import w3
+    reset_after_fork = getattr(w3.provider, 'reset_after_fork', None)
+    if reset_after_fork:
+        reset_after_fork()
+
+def post_worker_init(worker):
+    # Runs before the worker accepts connections
+    from wsgi import warm_up
+    warm_up()
+    worker.log.info("Worker %s warmed up", worker.pid)
@@ -0,0 +1,175 @@
+from flask import request, jsonify, make_response, current_app
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import IdempotencyKey
+from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+import threading
+import time
+
+# Requests waiting in this process on a duplicate that is still running
+_waiters = {}
+_waiters_lock = threading.Lock()
+_last_purge = 0.0
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def _replay(record):
+    response = make_response(record.response_body, record.response_status)
+    response.mimetype = 'application/json'
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _purge_expired(ttl):
+    """Delete expired keys, at most once an hour per process"""
+    global _last_purge
+    if time.monotonic() - _last_purge < 3600:
+        return
+    _last_purge = time.monotonic()
+    IdempotencyKey.query.filter(IdempotencyKey.created_at < datetime.utcnow() - ttl).delete()
+    db.session.commit()
+
+def _claim(user_id, key, fingerprint, ttl, lease):
+    """Insert an in-progress record; returns None if this request owns the key"""
+    try:
+        db.session.add(IdempotencyKey(user_id=user_id, key=key, fingerprint=fingerprint))
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    existing = IdempotencyKey.query.get((user_id, key))
+    if existing is None:
+        return None
+
+    now = datetime.utcnow()
+    expired = existing.created_at < now - ttl
+    # The owner of an in-progress key past its lease died mid-request
+    abandoned = (existing.status != 'completed' and existing.fingerprint == fingerprint
+                 and existing.created_at < now - lease)
+    if expired or abandoned:
+        # Only one of several concurrent retries deletes the record and takes over
+        taken = IdempotencyKey.query.filter_by(
+            user_id=user_id, key=key, created_at=existing.created_at
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        if taken:
+            return _claim(user_id, key, fingerprint, ttl, lease)
+        db.session.expire_all()
+        return IdempotencyKey.query.get((user_id, key))
+    return existing
+
+def _release(user_id, key):
+    """Drop an in-progress record so the next request with the key runs the view"""
+    db.session.rollback()
+    IdempotencyKey.query.filter_by(user_id=user_id, key=key).delete()
+    db.session.commit()
+
+def _wait_for(user_id, key, timeout, lease):
+    """Wait for the request that owns the key to store its response
+
+    Returns None if it is still running after `timeout` or its lease ran out.
+    """
+    with _waiters_lock:
+        event = _waiters.get((user_id, key))
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if event is not None:
+            # Same process: woken as soon as the owner finishes
+            event.wait(deadline - time.monotonic())
+        else:
+            # Owned by another worker: poll the stored record
+            time.sleep(0.25)
+
+        db.session.expire_all()
+        record = IdempotencyKey.query.get((user_id, key))
+        if record is None or record.status == 'completed':
+            return record
+        if record.created_at < datetime.utcnow() - lease:
+            return None
+        if event is not None and event.is_set():
+            event = None
+    return None
+
+def idempotent(view):
+    """Make a JWT-protected POST view safe to retry with an Idempotency-Key header
+
+    The first request with a key runs the view and stores its response.
+    Retries with the same key and body replay the stored response, and
+    concurrent duplicates wait for the first request instead of repeating
+    its work. Server errors are not stored, so a retry runs the view again.
+    A key whose request has been in progress for longer than its lease
+    (the worker died) is taken over by the next retry.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'error': 'Idempotency-Key must be at most 255 characters'}), 400
+
+        user_id = get_jwt_identity()
+        fingerprint = _fingerprint()
+        ttl = timedelta(hours=current_app.config.get('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+        lease = timedelta(seconds=current_app.config.get('IDEMPOTENCY_LEASE_SECONDS', 240))
+
+        _purge_expired(ttl)
+
+        existing = _claim(user_id, key, fingerprint, ttl, lease)
+        if existing is not None and existing.fingerprint == fingerprint and existing.status != 'completed':
+            existing = _wait_for(user_id, key, current_app.config.get('IDEMPOTENCY_WAIT_TIMEOUT', 130), lease)
+            if existing is None:
+                # Finished without a stored response, or abandoned: try to own the key
+                existing = _claim(user_id, key, fingerprint, ttl, lease)
+                if existing is not None and existing.status != 'completed':
+                    response = jsonify({'error': 'A request with this Idempotency-Key is still in progress'})
+                    response.status_code = 409
+                    response.headers['Retry-After'] = '5'
+                    return response
+
+        if existing is None:
+            with _waiters_lock:
+                _waiters[(user_id, key)] = threading.Event()
+
+        if existing is not None:
+            if existing.fingerprint != fingerprint:
+                return jsonify({'error': 'Idempotency-Key was already used with a different request'}), 422
+            return _replay(existing)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+
+            if response.status_code >= 500:
+                # Views report their own failures as JSON 500s; those may be
+                # transient, so release the key instead of replaying them
+                _release(user_id, key)
+                return response
+
+            record = IdempotencyKey.query.get((user_id, key))
+            record.status = 'completed'
+            record.response_status = response.status_code
+            record.response_body = response.get_data(as_text=True)
+            db.session.commit()
+            return response
+
+        except Exception:
+            # Nothing to replay; let the client retry with the same key
+            _release(user_id, key)
+            raise
+
+        finally:
+            with _waiters_lock:
+                event = _waiters.pop((user_id, key), None)
+            if event:
+                event.set()
+
+    return wrapper
@@ -0,0 +1,192 @@
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
+
+SNAPSHOT_MAGIC = b'CVBF1'
+# magic, bit count, hash count, item count, settled certificate row id, settled share link row id
+SNAPSHOT_HEADER = struct.Struct('>5sQIQQQ')
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys"""
+
+    def __init__(self, capacity, fp_rate):
+        capacity = max(int(capacity), 1)
+        self.num_bits = max(int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, value):
+        # Keys seen again through a refresh are not counted twice
+        if value in self:
+            return
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def estimated_fp_rate(self):
+        """False-positive rate for the number of items added so far"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+class LookupFilter:
+    """Negative-lookup filter over certificate IDs, hashes and share link tokens"""
+
+    def __init__(self):
+        self.enabled = False
+        self.bloom = None
+        self.fp_rate = None
+        self.snapshot_path = None
+        self.refresh_interval = 1.0
+        self.settle_seconds = 180.0
+        self.last_certificate_id = 0
+        self.last_share_link_id = 0
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Build the filter from the snapshot and catch up on newer rows"""
+        self.enabled = app.config.get('LOOKUP_FILTER_ENABLED', True)
+        if not self.enabled:
+            return
+
+        self.fp_rate = app.config.get('LOOKUP_FILTER_FP_RATE', 0.01)
+        self.snapshot_path = app.config.get('LOOKUP_FILTER_SNAPSHOT')
+        self.refresh_interval = app.config.get('LOOKUP_FILTER_REFRESH_SECONDS', 1.0)
+        self.settle_seconds = app.config.get('LOOKUP_FILTER_SETTLE_SECONDS', 180.0)
+        capacity = app.config.get('LOOKUP_FILTER_CAPACITY', 1000000)
+
+        if not self._load_snapshot(capacity):
+            self.bloom = BloomFilter(capacity, self.fp_rate)
+
+        with app.app_context():
+            self.refresh()
+        self.save_snapshot()
+
+        stats = self.stats()
+        print(f"Lookup filter ready: {stats['items']} keys, {stats['memory_bytes']} bytes, "
+              f"estimated false-positive rate {stats['estimated_fp_rate']:.4%}")
+
+    def add(self, *values):
+        if not self.enabled:
+            return
+        with self._lock:
+            for value in values:
+                if value:
+                    self.bloom.add(value)
+
+    def might_contain(self, value):
+        """False means the value definitely does not exist"""
+        if not self.enabled or not value:
+            return True
+        if value in self.bloom:
+            return True
+
+        # Rows created by other workers only reach this filter through a refresh
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self.refresh()
+            return value in self.bloom
+        return False
+
+    def refresh(self):
+        """Add rows created since the last refresh
+
+        Row ids are assigned at flush, but /issue only commits once the chain
+        confirms, so a lower id can become visible after a higher one. Rows
+        younger than the settle window are therefore read again on every
+        refresh, and the watermark only moves past rows older than it.
+        """
+        from models import Certificate, ShareLink
+
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            settled_before = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+
+            certificates = Certificate.query.with_entities(
+                Certificate.id, Certificate.certificate_id, Certificate.certificate_hash, Certificate.created_at
+            ).filter(Certificate.id > self.last_certificate_id).order_by(Certificate.id).yield_per(1000)
+            for row_id, certificate_id, certificate_hash, created_at in certificates:
+                self.bloom.add(certificate_id)
+                if certificate_hash:
+                    self.bloom.add(certificate_hash)
+                if created_at is None or created_at < settled_before:
+                    self.last_certificate_id = row_id
+
+            share_links = ShareLink.query.with_entities(
+                ShareLink.id, ShareLink.link_token, ShareLink.created_at
+            ).filter(ShareLink.id > self.last_share_link_id).order_by(ShareLink.id).yield_per(1000)
+            for row_id, link_token, created_at in share_links:
+                self.bloom.add(link_token)
+                if created_at is None or created_at < settled_before:
+                    self.last_share_link_id = row_id
+
+    def _load_snapshot(self, capacity):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+
+        expected = BloomFilter(capacity, self.fp_rate)
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                magic, num_bits, num_hashes, count, last_certificate_id, last_share_link_id = \
+                    SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+                # A snapshot built for a different size is rebuilt from the database
+                if magic != SNAPSHOT_MAGIC or num_bits != expected.num_bits or num_hashes != expected.num_hashes:
+                    return False
+                bits = f.read()
+                if len(bits) != len(expected.bits):
+                    return False
+        except Exception as e:
+            print(f"Warning: Could not load lookup filter snapshot: {e}")
+            return False
+
+        expected.bits = bytearray(bits)
+        expected.count = count
+        self.bloom = expected
+        self.last_certificate_id = last_certificate_id
+        self.last_share_link_id = last_share_link_id
+        return True
+
+    def save_snapshot(self):
+        if not self.enabled or not self.snapshot_path:
+            return
+        try:
+            tmp_path = self.snapshot_path + '.tmp'
+            with self._lock:
+                header = SNAPSHOT_HEADER.pack(
+                    SNAPSHOT_MAGIC, self.bloom.num_bits, self.bloom.num_hashes, self.bloom.count,
+                    self.last_certificate_id, self.last_share_link_id
+                )
+                with open(tmp_path, 'wb') as f:
+                    f.write(header)
+                    f.write(self.bloom.bits)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"Warning: Could not save lookup filter snapshot: {e}")
+
+    def stats(self):
+        if not self.enabled:
+            return {'enabled': False}
+        return {
+            'enabled': True,
+            'items': self.bloom.count,
+            'memory_bytes': len(self.bloom.bits),
+            'hash_functions': self.bloom.num_hashes,
+            'target_fp_rate': self.fp_rate,
+            'estimated_fp_rate': self.bloom.estimated_fp_rate()
+        }
+
+# Process-wide filter shared by the routes
+lookup_filter = LookupFilter()
@@ -0,0 +1,135 @@
+from extensions import db
+from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime
+import secrets
+import uuid
+import json
+
+class User(db.Model):
+    __tablename__ = 'users'
+
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(100), unique=True, nullable=False, index=True)
+    email = db.Column(db.String(120), unique=True, nullable=False, index=True)
+    password_hash = db.Column(db.String(256), nullable=False)
+    role = db.Column(db.String(20), nullable=False, default='user')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_active = db.Column(db.Boolean, default=True)
+
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'role': self.role,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'is_active': self.is_active
+        }
+
+class Certificate(db.Model):
+    __tablename__ = 'certificates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    certificate_id = db.Column(db.String(36), unique=True, nullable=False, index=True, default=lambda: str(uuid.uuid4()))
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    issuer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    student_name = db.Column(db.String(200), nullable=False)
+    course_name = db.Column(db.String(200), nullable=False)
+    issue_date = db.Column(db.Date, nullable=False)
+    expiration_date = db.Column(db.Date)
+    certificate_hash = db.Column(db.String(64), unique=True, index=True)
+    blockchain_tx_hash = db.Column(db.String(66))
+    blockchain_status = db.Column(db.String(20), default='pending')
+    # Sequence number assigned by the contract; indexes the on-chain revocation bitmap
+    chain_serial = db.Column(db.Integer, index=True)
+    # SHA-256 of the attached certificate document, if any
+    document_hash = db.Column(db.String(64), db.ForeignKey('documents.digest'), index=True)
+    # "metadata" is reserved by SQLAlchemy's declarative base
+    metadata_json = db.Column('metadata', db.Text)
+    is_revoked = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'certificate_id': self.certificate_id,
+            'owner_id': self.owner_id,
+            'issuer_id': self.issuer_id,
+            'student_name': self.student_name,
+            'course_name': self.course_name,
+            'issue_date': self.issue_date.isoformat() if self.issue_date else None,
+            'expiration_date': self.expiration_date.isoformat() if self.expiration_date else None,
+            'certificate_hash': self.certificate_hash,
+            'blockchain_tx_hash': self.blockchain_tx_hash,
+            'blockchain_status': self.blockchain_status,
+            'chain_serial': self.chain_serial,
+            'document_hash': self.document_hash,
+            'metadata': json.loads(self.metadata_json) if self.metadata_json else None,
+            'is_revoked': self.is_revoked,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class Document(db.Model):
+    __tablename__ = 'documents'
+
+    # Documents are content-addressed: identical uploads share one row and one stored file
+    digest = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(100), nullable=False, default='application/octet-stream')
+    filename = db.Column(db.String(255))
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'digest': self.digest,
+            'size': self.size,
+            'content_type': self.content_type,
+            'filename': self.filename,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class ShareLink(db.Model):
+    __tablename__ = 'share_links'
+
+    id = db.Column(db.Integer, primary_key=True)
+    link_token = db.Column(db.String(64), unique=True, nullable=False, index=True, default=lambda: secrets.token_urlsafe(32))
+    certificate_id = db.Column(db.Integer, db.ForeignKey('certificates.id'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_active = db.Column(db.Boolean, default=True)
+    access_count = db.Column(db.Integer, default=0)
+
+    def is_expired(self):
+        return datetime.utcnow() > self.expires_at
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'link_token': self.link_token,
+            'certificate_id': self.certificate_id,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'is_active': self.is_active,
+            'access_count': self.access_count
+        }
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    # SHA-256 of method, path and body; a reused key must carry the same request
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='in_progress')
+    response_status = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,121 @@
+from contextlib import contextmanager
+import json
+import threading
+import time
+
+class MemoryNonceStore:
+    """Nonce state for a single process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    @contextmanager
+    def hold(self):
+        """Exclusive access to the nonce state; changes are kept only on a clean exit"""
+        with self._lock:
+            state = dict(self._state)
+            yield state
+            self._state = state
+
+class FileNonceStore:
+    """Nonce state shared by the worker processes of one host through flock"""
+
+    def __init__(self, path):
+        import fcntl
+        self._fcntl = fcntl
+        self.path = path
+        # flock does not exclude threads sharing a process, so they queue here first
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self):
+        with self._lock, open(self.path, 'a+') as f:
+            self._fcntl.flock(f, self._fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                state = json.loads(content) if content else {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                self._fcntl.flock(f, self._fcntl.LOCK_UN)
+
+class RedisNonceStore:
+    """Nonce state shared by every host through a Redis lock"""
+
+    def __init__(self, url, key='nonce:state', lock_timeout=60):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis package is required for NONCE_STORAGE_URL=redis://...")
+
+        self.key = key
+        self.lock_timeout = lock_timeout
+        self._client = redis.Redis.from_url(url)
+
+    @contextmanager
+    def hold(self):
+        with self._client.lock(self.key + ':lock', timeout=self.lock_timeout, blocking_timeout=self.lock_timeout):
+            content = self._client.get(self.key)
+            state = json.loads(content) if content else {}
+            yield state
+            self._client.set(self.key, json.dumps(state))
+
+def create_nonce_store(url):
+    """Build a nonce store from a storage URL"""
+    if url.startswith('redis://') or url.startswith('rediss://'):
+        return RedisNonceStore(url)
+    if url.startswith('file://'):
+        try:
+            return FileNonceStore(url[len('file://'):])
+        except ImportError:
+            # No flock (Windows): fine for the single-process development server
+            print("Warning: File locks unavailable; nonces are only serialized within this process")
+            return MemoryNonceStore()
+    if url == 'memory://':
+        return MemoryNonceStore()
+    raise ValueError(f"Unsupported NONCE_STORAGE_URL: {url}")
+
+class NonceAllocator:
+    """Hands out consecutive nonces for one sending account
+
+    Reading the node's 'pending' count only accounts for transactions that
+    were already sent, so two concurrent sends can read the same value. The
+    allocator holds the store's lock from allocation until the transaction
+    is sent and remembers the next nonce itself. If the node's count stays
+    below it without moving for resync_after seconds (a sent transaction was
+    dropped), it goes back to the node's count so later sends don't queue
+    behind a gap.
+    """
+
+    def __init__(self, w3, address, store, resync_after=60.0):
+        self.w3 = w3
+        self.address = address
+        self.store = store
+        self.resync_after = resync_after
+
+    @contextmanager
+    def next_nonce(self):
+        """Yield the nonce to send with; it is used up only if the block exits without error"""
+        with self.store.hold() as state:
+            now = time.time()
+            pending = self.w3.eth.get_transaction_count(self.address, 'pending')
+            remembered = state.get(self.address) or {'next': 0, 'node': 0, 'ahead_since': None}
+
+            nonce, ahead_since = pending, None
+            if remembered['next'] > pending:
+                # The node either lags behind our last send or dropped it; a
+                # lagging node still makes progress, a dropped nonce stalls it
+                ahead_since = now if pending > remembered['node'] else (remembered['ahead_since'] or now)
+                if now - ahead_since < self.resync_after:
+                    nonce = remembered['next']
+                else:
+                    ahead_since = None
+
+            yield nonce
+
+            state[self.address] = {'next': nonce + 1, 'node': pending, 'ahead_since': ahead_since}
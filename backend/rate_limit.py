@@ -0,0 +1,190 @@
+from flask import request, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from collections import OrderedDict
+import math
+import threading
+import time
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+def parse_limit(limit):
+    """Parse a limit such as "10/minute" into (capacity, tokens per second)"""
+    count, period = limit.split('/')
+    count = int(count)
+    return count, count / PERIODS[period.strip()]
+
+class MemoryStore:
+    """In-process token buckets for single-node deployments
+
+    A bucket that has refilled completely is indistinguishable from a
+    missing one, so full buckets are swept out periodically; max_entries
+    bounds memory when clients rotate addresses faster than buckets refill.
+    The clock can be replaced to drive time deterministically in tests.
+    """
+
+    def __init__(self, clock=time.monotonic, max_entries=100000, sweep_interval=60.0):
+        self.clock = clock
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        # key -> (tokens, updated, time at which the bucket is full again)
+        self._buckets = OrderedDict()
+        self._last_sweep = clock()
+        self._lock = threading.Lock()
+
+    def consume(self, keys, capacity, rate):
+        """Take one token from every bucket, or from none if any is empty
+
+        Returns (allowed, seconds until every bucket has a token).
+        """
+        with self._lock:
+            now = self.clock()
+            tokens = []
+            for key in keys:
+                bucket_tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+                tokens.append(min(capacity, bucket_tokens + (now - updated) * rate))
+
+            allowed = all(value >= 1 for value in tokens)
+            if allowed:
+                tokens = [value - 1 for value in tokens]
+
+            for key, value in zip(keys, tokens):
+                self._buckets[key] = (value, now, now + (capacity - value) / rate)
+                self._buckets.move_to_end(key)
+
+            self._evict(now)
+
+            if allowed:
+                return True, 0
+            return False, max((1 - value) / rate for value in tokens)
+
+    def _evict(self, now):
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+                del self._buckets[key]
+        # Least recently used first
+        while len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+
+# Refill every bucket, then consume from all of them or none, atomically on
+# the Redis server and using its clock so all workers agree on elapsed time
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tokens = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+    local value = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens[i] = math.min(capacity, value + (now - updated) * rate)
+    if tokens[i] < 1 then
+        allowed = 0
+    end
+end
+local lowest = capacity
+for i, key in ipairs(KEYS) do
+    tokens[i] = tokens[i] - allowed
+    lowest = math.min(lowest, tokens[i])
+    redis.call('HSET', key, 'tokens', tostring(tokens[i]), 'updated', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+return {allowed, tostring(lowest)}
+"""
+
+class RedisStore:
+    """Token buckets shared by every worker through Redis"""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis package is required for RATE_LIMIT_STORAGE_URL=redis://...")
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, keys, capacity, rate):
+        allowed, tokens = self._script(keys=[self.prefix + key for key in keys], args=[capacity, rate])
+        if allowed:
+            return True, 0
+        return False, (1 - float(tokens)) / rate
+
+def create_store(url):
+    """Build a counter store from a storage URL"""
+    if url.startswith('redis://') or url.startswith('rediss://'):
+        return RedisStore(url)
+    if url == 'memory://':
+        return MemoryStore()
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE_URL: {url}")
+
+class RateLimiter:
+    """Per-IP and per-identity token bucket limits keyed by endpoint name"""
+
+    def __init__(self):
+        self.enabled = False
+        self.store = None
+        self.limits = {}
+        self.trust_proxy = False
+
+    def init_app(self, app, store=None):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        if not self.enabled:
+            return
+
+        self.store = store or create_store(app.config.get('RATE_LIMIT_STORAGE_URL', 'memory://'))
+        self.limits = {
+            endpoint: parse_limit(limit)
+            for endpoint, limit in app.config.get('RATE_LIMITS', {}).items()
+        }
+        self.trust_proxy = app.config.get('RATE_LIMIT_TRUST_PROXY', False)
+
+        # Runs before the view, so shed requests never touch the DB or RPC node
+        app.before_request(self.check)
+
+    def _client_ip(self):
+        # Earlier X-Forwarded-For entries come from the client and can be
+        # forged; only the address our proxy appended is trustworthy
+        if self.trust_proxy and request.access_route:
+            return request.access_route[-1]
+        return request.remote_addr or 'unknown'
+
+    def _identity(self):
+        try:
+            verify_jwt_in_request(optional=True)
+            return get_jwt_identity()
+        except Exception:
+            # Invalid tokens are rejected by the view itself
+            return None
+
+    def check(self):
+        limit = self.limits.get(request.endpoint)
+        if not limit:
+            return None
+
+        capacity, rate = limit
+        keys = [f'{request.endpoint}:ip:{self._client_ip()}']
+        identity = self._identity()
+        if identity is not None:
+            keys.append(f'{request.endpoint}:user:{identity}')
+
+        # A request rejected by one bucket spends no token from the other
+        try:
+            allowed, retry_after = self.store.consume(keys, capacity, rate)
+        except Exception as e:
+            # Fail open: an unavailable counter store must not take the API down
+            print(f"Warning: Rate limit store unavailable: {e}")
+            return None
+
+        if not allowed:
+            response = jsonify({'error': 'Too many requests. Please try again later'})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+            return response
+        return None
+
+# Process-wide limiter registered on the app
+rate_limiter = RateLimiter()
@@ -0,0 +1,223 @@
+from models import Certificate
+from extensions import db
+from blockchain_utils import w3, get_contract, certificate_hash_topic, CONTRACT_DEPLOY_BLOCK, check_certificate_on_blockchain, store_certificate_on_blockchain, revoke_certificates_on_blockchain, revocation_chunks
+from confirmations import ConfirmationTimeout
+from revocation import revocation_mirror
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from eth_utils import event_abi_to_log_topic
+
+SCAN_COLUMNS = [
+    Certificate.id, Certificate.certificate_id, Certificate.certificate_hash,
+    Certificate.blockchain_status, Certificate.is_revoked, Certificate.chain_serial,
+    Certificate.created_at
+]
+
+def build_event_index(contract, from_block=0, window=5000):
+    """Index CertificateIssued logs by hash topic -> (serial, tx hash)
+
+    One eth_getLogs call per window of blocks replaces one eth_call per
+    certificate, which is what makes full scans cheap for the node.
+    """
+    event = contract.events.CertificateIssued()
+    event_topic = Web3.to_hex(event_abi_to_log_topic(event.abi))
+    latest = w3.eth.block_number
+    index = {}
+
+    for start in range(from_block, latest + 1, window):
+        logs = w3.eth.get_logs({
+            'address': contract.address,
+            'fromBlock': start,
+            'toBlock': min(start + window - 1, latest),
+            'topics': [event_topic]
+        })
+        for log in logs:
+            decoded = event.process_log(log)
+            index[bytes(decoded['args']['hash'])] = (decoded['args']['serial'], Web3.to_hex(log['transactionHash']))
+
+    return index
+
+def _check_with_index(index):
+    def check(certificate_hash):
+        entry = index.get(certificate_hash_topic(certificate_hash))
+        if not entry:
+            return {'exists': False, 'revoked': False, 'serial': None, 'tx_hash': None}
+        serial, tx_hash = entry
+        return {'exists': True, 'revoked': revocation_mirror.is_revoked(serial), 'serial': serial, 'tx_hash': tx_hash}
+    return check
+
+def _check_with_calls(certificate_hash):
+    result = check_certificate_on_blockchain(certificate_hash)
+    result['tx_hash'] = None
+    return result
+
+def _safe(check):
+    def wrapped(certificate_hash):
+        try:
+            return check(certificate_hash)
+        except Exception as e:
+            print(f"Error checking certificate {certificate_hash} on blockchain: {str(e)}")
+            return None
+    return wrapped
+
+def _new_report():
+    return {
+        'started_at': datetime.utcnow().isoformat(),
+        'scanned': 0,
+        'confirmed_ok': 0,
+        'serials_filled': 0,
+        'recovered': [],
+        'missing_on_chain': [],
+        'revocation_not_on_chain': [],
+        'revoked_on_chain_only': [],
+        'retried': [],
+        'retry_failed': [],
+        'still_pending': [],
+        'errors': []
+    }
+
+def reconcile(page_size=1000, concurrency=8, repair=True, max_retries=100,
+              use_event_index=False, from_block=0, pending_grace_minutes=10, progress=None):
+    """Compare Certificate rows against the chain and repair what can be repaired
+
+    Rows are scanned in keyset-paged chunks (id > last id) so the scan holds
+    no long transaction and resumes cheaply. Chain lookups for a page run on
+    at most `concurrency` threads, bounding load on the RPC node. Must run
+    inside an application context.
+    """
+    contract = get_contract()
+    report = _new_report()
+    revocation_mirror.sync(contract)
+
+    if use_event_index:
+        check = _check_with_index(build_event_index(contract, from_block=from_block or CONTRACT_DEPLOY_BLOCK))
+    else:
+        check = _check_with_calls
+
+    pending_cutoff = datetime.utcnow() - timedelta(minutes=pending_grace_minutes)
+    to_retry = []
+    to_revoke = []
+    last_id = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            page = Certificate.query.with_entities(*SCAN_COLUMNS).filter(
+                Certificate.id > last_id
+            ).order_by(Certificate.id).limit(page_size).all()
+
+            if not page:
+                break
+            last_id = page[-1].id
+
+            hashes = [row.certificate_hash for row in page]
+            results = list(executor.map(_safe(check), hashes))
+            updates = []
+
+            for row, result in zip(page, results):
+                report['scanned'] += 1
+
+                if result is None:
+                    report['errors'].append(row.certificate_id)
+                    continue
+
+                update = {}
+                if result['exists'] and row.chain_serial is None:
+                    update['chain_serial'] = result['serial']
+                    report['serials_filled'] += 1
+
+                if row.blockchain_status == 'confirmed':
+                    if result['exists']:
+                        report['confirmed_ok'] += 1
+                    else:
+                        report['missing_on_chain'].append(row.certificate_id)
+                elif result['exists']:
+                    # The transaction landed even though issuance reported a failure
+                    update['blockchain_status'] = 'confirmed'
+                    if result['tx_hash']:
+                        update['blockchain_tx_hash'] = result['tx_hash']
+                    report['recovered'].append(row.certificate_id)
+                elif row.blockchain_status == 'failed' or (row.created_at and row.created_at < pending_cutoff):
+                    to_retry.append(row.id)
+
+                serial = update.get('chain_serial', row.chain_serial)
+                if result['exists'] and row.is_revoked and not result['revoked']:
+                    report['revocation_not_on_chain'].append(row.certificate_id)
+                    to_revoke.append(serial)
+                elif result['revoked'] and not row.is_revoked:
+                    report['revoked_on_chain_only'].append(row.certificate_id)
+
+                if update:
+                    update['id'] = row.id
+                    updates.append(update)
+
+            if updates and repair:
+                db.session.bulk_update_mappings(Certificate, updates)
+            db.session.commit()
+
+            if progress:
+                progress(report)
+
+    if repair:
+        _retry_anchors(to_retry[:max_retries], report)
+        report['retry_deferred'] = max(len(to_retry) - max_retries, 0)
+        for chunk in revocation_chunks(to_revoke):
+            try:
+                revoke_certificates_on_blockchain(chunk)
+            except Exception as e:
+                report['errors'].append(f'revocation batch of {len(chunk)} serials from {chunk[0]}: {e}')
+
+    report['finished_at'] = datetime.utcnow().isoformat()
+    return report
+
+def _recorded_transaction_state(tx_hash):
+    """'pending', 'mined', 'failed' or 'missing' for the anchor a row already sent"""
+    if not tx_hash:
+        return 'missing'
+    try:
+        transaction = w3.eth.get_transaction(tx_hash)
+    except TransactionNotFound:
+        return 'missing'
+    if transaction['blockNumber'] is None:
+        return 'pending'
+    receipt = w3.eth.get_transaction_receipt(tx_hash)
+    return 'mined' if receipt['status'] == 1 else 'failed'
+
+def _retry_anchors(certificate_row_ids, report):
+    """Resubmit failed anchors one at a time so each gets the next nonce"""
+    for row_id in certificate_row_ids:
+        certificate = Certificate.query.get(row_id)
+
+        # A transaction still in the mempool (or mined since the scan) would
+        # make the resubmission revert with "already exists"
+        try:
+            state = _recorded_transaction_state(certificate.blockchain_tx_hash)
+        except Exception as e:
+            report['errors'].append(f'{certificate.certificate_id}: {e}')
+            continue
+        if state in ('pending', 'mined'):
+            report['still_pending'].append(certificate.certificate_id)
+            continue
+
+        try:
+            tx_hash, serial = store_certificate_on_blockchain(
+                certificate_id=certificate.certificate_id,
+                certificate_hash=certificate.certificate_hash,
+                student_name=certificate.student_name,
+                course_name=certificate.course_name,
+                issue_date=str(certificate.issue_date)
+            )
+            certificate.blockchain_tx_hash = tx_hash
+            certificate.blockchain_status = 'confirmed'
+            certificate.chain_serial = serial
+            report['retried'].append(certificate.certificate_id)
+        except ConfirmationTimeout as e:
+            # Sent; the next pass finds it on chain
+            certificate.blockchain_tx_hash = e.tx_hash
+            certificate.blockchain_status = 'pending'
+            report['retried'].append(certificate.certificate_id)
+        except Exception:
+            certificate.blockchain_status = 'failed'
+            report['retry_failed'].append(certificate.certificate_id)
+        db.session.commit()
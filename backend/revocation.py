@@ -0,0 +1,56 @@
+import threading
+
+# Each bitmap word on chain covers 256 certificate serials
+WORD_BITS = 256
+
+class RevocationMirror:
+    """Local copy of the on-chain revocation bitmap for O(1) revocation checks"""
+
+    def __init__(self):
+        self._words = {}
+        self._lock = threading.Lock()
+        self.epoch = 0
+
+    def is_revoked(self, serial):
+        """Check a certificate serial against the mirrored bitmap"""
+        if serial is None:
+            return False
+        word = self._words.get(serial // WORD_BITS, 0)
+        return (word >> (serial % WORD_BITS)) & 1 == 1
+
+    def mark_revoked(self, serials, epoch=None):
+        """Set revocation bits after a confirmed revokeCertificates transaction"""
+        with self._lock:
+            for serial in serials:
+                index = serial // WORD_BITS
+                self._words[index] = self._words.get(index, 0) | (1 << (serial % WORD_BITS))
+            # Only a directly following epoch is complete; after a gap (another
+            # worker revoked in between) the next sync must still reload the words
+            if epoch is not None and epoch == self.epoch + 1:
+                self.epoch = epoch
+
+    def load_word(self, index, word):
+        """Replace one bitmap word with the value read from chain"""
+        with self._lock:
+            if word:
+                self._words[index] = word
+            else:
+                self._words.pop(index, None)
+
+    def sync(self, contract):
+        """Refresh the mirror from chain, one call per 256 issued certificates"""
+        total = contract.functions.getTotalCertificates().call()
+        epoch = contract.functions.revocationEpoch().call()
+
+        # Nothing was revoked since the last sync
+        if epoch == self.epoch:
+            return epoch
+
+        for index in range((total + WORD_BITS - 1) // WORD_BITS):
+            self.load_word(index, contract.functions.getRevocationWord(index).call())
+
+        self.epoch = epoch
+        return epoch
+
+# Process-wide mirror shared by the routes
+revocation_mirror = RevocationMirror()
@@ -1,15 +1,50 @@
-from flask import Blueprint, request, jsonify
-from models import Certificate, User, ShareLink
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from models import Certificate, User, ShareLink, Document
 from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from blockchain_utils import calculate_certificate_hash, store_certificate_on_blockchain, verify_certificate_on_blockchain
+from blockchain_utils import calculate_certificate_hash, store_certificate_on_blockchain, check_certificate_on_blockchain, revoke_certificates_on_blockchain, revocation_chunks, issued_serial
+from confirmations import ConfirmationTimeout
+from revocation import revocation_mirror
+from lookup_filter import lookup_filter
+from export import iter_export, EXPORT_FORMATS
+from idempotency import idempotent
+from attestations import attestation_issuer
 import json
+import time
 
 certificates_bp = Blueprint('certificates', __name__)
 
+def _attestation_or_none(certificate):
+    """Signed attestation to hand out alongside a freshly confirmed certificate"""
+    if not attestation_issuer.enabled:
+        return None
+    if certificate.expiration_date and certificate.expiration_date < datetime.utcnow().date():
+        return None
+    try:
+        token, _ = attestation_issuer.get(certificate)
+        return token
+    except Exception as e:
+        print(f"Warning: Could not sign attestation for {certificate.certificate_id}: {str(e)}")
+        return None
+
+def _blockchain_status_updater(app, certificate_row_id):
+    """Callback that records the final anchoring outcome once the tracker resolves it"""
+    def update(pending):
+        with app.app_context():
+            certificate = Certificate.query.get(certificate_row_id)
+            if not certificate:
+                return
+            certificate.blockchain_tx_hash = pending.tx_hash
+            certificate.blockchain_status = 'confirmed' if pending.status == 'confirmed' else 'failed'
+            if pending.status == 'confirmed' and certificate.chain_serial is None:
+                certificate.chain_serial = issued_serial(pending.receipt)
+            db.session.commit()
+    return update
+
 @certificates_bp.route('/issue', methods=['POST'])
 @jwt_required()
+@idempotent
 def issue_certificate():
     try:
         current_user_id = get_jwt_identity()
@@ -29,6 +64,7 @@ def issue_certificate():
         issue_date = data.get('issue_date')
         expiration_date = data.get('expiration_date')
         metadata = data.get('metadata')
+        document_hash = data.get('document_hash')  # Digest returned by POST /api/documents
         
         if not student_name or not course_name or not owner_id:
             return jsonify({'error': 'student_name, course_name, and owner_id are required'}), 400
@@ -38,6 +74,9 @@ def issue_certificate():
         if not owner:
             return jsonify({'error': 'Owner not found'}), 404
         
+        if document_hash and not Document.query.get(document_hash):
+            return jsonify({'error': 'Document not found. Upload it before issuing the certificate'}), 400
+        
         # Parse dates
         try:
             if issue_date:
@@ -58,7 +97,8 @@ def issue_certificate():
             course_name=course_name,
             issue_date=issue_date,
             expiration_date=expiration_date,
-            metadata=json.dumps(metadata) if metadata else None
+            document_hash=document_hash,
+            metadata_json=json.dumps(metadata) if metadata else None
         )
         
         # Calculate certificate hash
@@ -67,7 +107,8 @@ def issue_certificate():
             course_name=course_name,
             issue_date=str(issue_date),
             issuer_id=current_user_id,
-            owner_id=owner_id
+            owner_id=owner_id,
+            document_hash=document_hash
         )
         certificate.certificate_hash = certificate_hash
         
@@ -76,18 +117,32 @@ def issue_certificate():
         
         # Store on blockchain
         try:
-            tx_hash = store_certificate_on_blockchain(
+            tx_hash, serial = store_certificate_on_blockchain(
                 certificate_id=certificate.certificate_id,
                 certificate_hash=certificate_hash,
                 student_name=student_name,
                 course_name=course_name,
-                issue_date=str(issue_date)
+                issue_date=str(issue_date),
+                on_resolved=_blockchain_status_updater(current_app._get_current_object(), certificate.id)
             )
             certificate.blockchain_tx_hash = tx_hash
             certificate.blockchain_status = 'confirmed'
+            # Lets verify and revoke check the local revocation mirror without a chain lookup
+            certificate.chain_serial = serial
+        except ConfirmationTimeout as e:
+            # Sent but not yet confirmed; the tracker callback records the outcome
+            certificate.blockchain_tx_hash = e.tx_hash
+            certificate.blockchain_status = 'pending'
+            db.session.commit()
+            lookup_filter.add(certificate.certificate_id, certificate.certificate_hash)
+            return jsonify({
+                'message': 'Certificate issued; blockchain confirmation pending',
+                'certificate': certificate.to_dict()
+            }), 202
         except Exception as e:
             certificate.blockchain_status = 'failed'
             db.session.commit()
+            lookup_filter.add(certificate.certificate_id, certificate.certificate_hash)
             return jsonify({
                 'error': 'Failed to store certificate on blockchain',
                 'details': str(e),
@@ -96,9 +151,12 @@ def issue_certificate():
         
         db.session.commit()
         
+        lookup_filter.add(certificate.certificate_id, certificate.certificate_hash)
+        
         return jsonify({
             'message': 'Certificate issued successfully',
-            'certificate': certificate.to_dict()
+            'certificate': certificate.to_dict(),
+            'attestation': _attestation_or_none(certificate)
         }), 201
     
     except Exception as e:
@@ -119,6 +177,13 @@ def verify_certificate():
         if not certificate_hash and not certificate_id:
             return jsonify({'error': 'certificate_hash or certificate_id is required'}), 400
         
+        # Definite misses never reach the database
+        if not lookup_filter.might_contain(certificate_id or certificate_hash):
+            return jsonify({
+                'verified': False,
+                'message': 'Certificate not found in database'
+            }), 404
+        
         # Find certificate in database
         if certificate_id:
             certificate = Certificate.query.filter_by(certificate_id=certificate_id).first()
@@ -131,15 +196,28 @@ def verify_certificate():
                 'message': 'Certificate not found in database'
             }), 404
         
-        if certificate.is_revoked:
+        if certificate.is_revoked or revocation_mirror.is_revoked(certificate.chain_serial):
             return jsonify({
                 'verified': False,
                 'message': 'Certificate has been revoked'
             }), 200
         
-        # Verify on blockchain
+        # Verify on blockchain (issuance and revocation in one call)
         try:
-            blockchain_verified = verify_certificate_on_blockchain(certificate.certificate_hash)
+            result = check_certificate_on_blockchain(certificate.certificate_hash)
+            
+            if result['exists'] and certificate.chain_serial is None:
+                certificate.chain_serial = result['serial']
+                db.session.commit()
+            
+            if result['revoked']:
+                return jsonify({
+                    'verified': False,
+                    'blockchain_verified': False,
+                    'message': 'Certificate has been revoked on blockchain'
+                }), 200
+            
+            blockchain_verified = result['exists']
             
             return jsonify({
                 'verified': blockchain_verified,
@@ -192,9 +270,59 @@ def get_issued_certificates():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@certificates_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_certificates():
+    try:
+        current_user_id = get_jwt_identity()
+        current_user = User.query.get(current_user_id)
+        
+        if not current_user or current_user.role != 'issuer':
+            return jsonify({'error': 'Unauthorized. Only issuers can export certificates'}), 403
+        
+        export_format = request.args.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': 'Invalid format. Must be "csv" or "ndjson"'}), 400
+        
+        # Each row carries its id; pass the last one received as cursor to resume
+        try:
+            cursor = int(request.args.get('cursor', 0))
+        except ValueError:
+            return jsonify({'error': 'cursor must be an integer'}), 400
+        
+        compress = request.args.get('compress') == 'gzip'
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        filename = f'certificates-{current_user_id}.{extension}'
+        if compress:
+            mimetype = 'application/gzip'
+            filename += '.gz'
+        
+        chunks = iter_export(export_format, issuer_id=current_user_id, after_id=cursor, compress=compress)
+        
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@certificates_bp.route('/attestation-key', methods=['GET'])
+def get_attestation_key():
+    if not attestation_issuer.enabled:
+        return jsonify({'error': 'Attestations are not enabled'}), 503
+    
+    response = jsonify(attestation_issuer.public_key_info())
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response, 200
+
 @certificates_bp.route('/<certificate_id>', methods=['GET'])
 def get_certificate(certificate_id):
     try:
+        if not lookup_filter.might_contain(certificate_id):
+            return jsonify({'error': 'Certificate not found'}), 404
+        
         certificate = Certificate.query.filter_by(certificate_id=certificate_id).first()
         
         if not certificate:
@@ -205,6 +333,46 @@ def get_certificate(certificate_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@certificates_bp.route('/<certificate_id>/attestation', methods=['GET'])
+def get_certificate_attestation(certificate_id):
+    try:
+        if not attestation_issuer.enabled:
+            return jsonify({'error': 'Attestations are not enabled'}), 503
+        
+        if not lookup_filter.might_contain(certificate_id):
+            return jsonify({'error': 'Certificate not found'}), 404
+        
+        certificate = Certificate.query.filter_by(certificate_id=certificate_id).first()
+        
+        if not certificate:
+            return jsonify({'error': 'Certificate not found'}), 404
+        
+        if certificate.is_revoked or revocation_mirror.is_revoked(certificate.chain_serial):
+            attestation_issuer.invalidate(certificate_id)
+            return jsonify({'error': 'Certificate has been revoked'}), 410
+        
+        if certificate.expiration_date and certificate.expiration_date < datetime.utcnow().date():
+            return jsonify({'error': 'Certificate has expired'}), 410
+        
+        if certificate.blockchain_status != 'confirmed':
+            return jsonify({'error': 'Certificate is not confirmed on blockchain yet'}), 409
+        
+        token, claims = attestation_issuer.get(certificate)
+        
+        response = jsonify({
+            'attestation': token,
+            'claims': claims,
+            'signer': attestation_issuer.signer
+        })
+        # Shared caches may serve the token until it is due to be re-signed;
+        # cached tokens were signed earlier, so count from now rather than iat
+        max_age = max(0, claims['exp'] - attestation_issuer.ttl // 4 - int(time.time()))
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+        return response, 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @certificates_bp.route('/<certificate_id>/share', methods=['POST'])
 @jwt_required()
 def create_share_link(certificate_id):
@@ -232,6 +400,8 @@ def create_share_link(certificate_id):
         db.session.add(share_link)
         db.session.commit()
         
+        lookup_filter.add(share_link.link_token)
+        
         return jsonify({
             'message': 'Share link created successfully',
             'share_link': share_link.to_dict(),
@@ -245,6 +415,9 @@ def create_share_link(certificate_id):
 @certificates_bp.route('/share/<link_token>', methods=['GET'])
 def get_shared_certificate(link_token):
     try:
+        if not lookup_filter.might_contain(link_token):
+            return jsonify({'error': 'Share link not found'}), 404
+        
         share_link = ShareLink.query.filter_by(link_token=link_token).first()
         
         if not share_link:
@@ -266,6 +439,65 @@ def get_shared_certificate(link_token):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _resolve_chain_serials(certificates):
+    """Fill in missing chain serials so certificates can be revoked on chain"""
+    serials = []
+    for certificate in certificates:
+        if certificate.chain_serial is None and certificate.blockchain_status == 'confirmed':
+            result = check_certificate_on_blockchain(certificate.certificate_hash)
+            if result['exists']:
+                certificate.chain_serial = result['serial']
+        if certificate.chain_serial is not None:
+            serials.append(certificate.chain_serial)
+    return serials
+
+def _mark_revoked(certificates):
+    now = datetime.utcnow()
+    for certificate in certificates:
+        certificate.is_revoked = True
+        certificate.updated_at = now
+    db.session.commit()
+    attestation_issuer.invalidate(*(certificate.certificate_id for certificate in certificates))
+
+def _revoke(certificates):
+    """Revoke certificates on chain in gas-bounded chunks, then in the database
+    
+    Each chunk is committed only once its transaction confirms, so the
+    database never claims a revocation the chain does not have. Returns the
+    transaction hashes and a list of failed chunks.
+    """
+    serials = _resolve_chain_serials(certificates)
+    db.session.commit()
+    
+    by_serial = {}
+    unanchored = []
+    for certificate in certificates:
+        if certificate.chain_serial is None:
+            unanchored.append(certificate)
+        else:
+            by_serial.setdefault(certificate.chain_serial, []).append(certificate)
+    
+    # Nothing on chain to keep in sync with
+    if unanchored:
+        _mark_revoked(unanchored)
+    
+    tx_hashes = []
+    failures = []
+    for chunk in revocation_chunks(serials):
+        chunk_certificates = [certificate for serial in chunk for certificate in by_serial[serial]]
+        try:
+            tx_hashes.append(revoke_certificates_on_blockchain(chunk))
+        except Exception as e:
+            db.session.rollback()
+            failures.append({
+                'certificate_ids': [certificate.certificate_id for certificate in chunk_certificates],
+                'error': str(e)
+            })
+            continue
+        _mark_revoked(chunk_certificates)
+    
+    return tx_hashes, failures
+
 @certificates_bp.route('/<certificate_id>/revoke', methods=['POST'])
 @jwt_required()
 def revoke_certificate(certificate_id):
@@ -281,17 +513,73 @@ def revoke_certificate(certificate_id):
         if certificate.issuer_id != current_user_id and current_user.role != 'issuer':
             return jsonify({'error': 'Unauthorized. Only the issuer can revoke certificates'}), 403
         
-        certificate.is_revoked = True
-        certificate.updated_at = datetime.utcnow()
+        tx_hashes, failures = _revoke([certificate])
         
-        db.session.commit()
+        if failures:
+            return jsonify({
+                'error': 'Failed to revoke certificate on blockchain',
+                'details': failures[0]['error'],
+                'certificate': certificate.to_dict()
+            }), 500
         
         return jsonify({
             'message': 'Certificate revoked successfully',
-            'certificate': certificate.to_dict()
+            'certificate': certificate.to_dict(),
+            'revocation_tx_hash': tx_hashes[0] if tx_hashes else None
         }), 200
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@certificates_bp.route('/revoke', methods=['POST'])
+@jwt_required()
+def revoke_certificates():
+    try:
+        current_user_id = get_jwt_identity()
+        current_user = User.query.get(current_user_id)
+        
+        if not current_user or current_user.role != 'issuer':
+            return jsonify({'error': 'Unauthorized. Only issuers can revoke certificates'}), 403
+        
+        data = request.get_json()
+        certificate_ids = data.get('certificate_ids') if data else None
+        
+        if not certificate_ids or not isinstance(certificate_ids, list):
+            return jsonify({'error': 'certificate_ids must be a non-empty list'}), 400
+        
+        # Every chunk waits for confirmation, so the request must finish within the worker timeout
+        max_certificates = current_app.config.get('REVOCATION_MAX_CERTIFICATES', 1000)
+        if len(certificate_ids) > max_certificates:
+            return jsonify({'error': f'At most {max_certificates} certificates can be revoked per request'}), 400
+        
+        certificates = Certificate.query.filter(
+            Certificate.certificate_id.in_(certificate_ids),
+            Certificate.issuer_id == current_user_id
+        ).all()
+        
+        found = {certificate.certificate_id for certificate in certificates}
+        missing = [cid for cid in certificate_ids if cid not in found]
+        if missing:
+            return jsonify({'error': 'Certificates not found', 'certificate_ids': missing}), 404
+        
+        tx_hashes, failures = _revoke(certificates)
+        
+        if failures:
+            # Certificates in failed chunks stay unrevoked and can be sent again
+            return jsonify({
+                'error': 'Failed to revoke some certificates on blockchain',
+                'failed': failures,
+                'certificates': [cert.to_dict() for cert in certificates],
+                'revocation_tx_hashes': tx_hashes
+            }), 500
+        
+        return jsonify({
+            'message': f'{len(certificates)} certificates revoked successfully',
+            'certificates': [cert.to_dict() for cert in certificates],
+            'revocation_tx_hashes': tx_hashes
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
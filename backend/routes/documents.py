@@ -0,0 +1,87 @@
+from flask import Blueprint, request, jsonify, current_app, send_file, redirect
+from models import Document, User
+from extensions import db
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from document_store import DocumentTooLarge
+import re
+
+documents_bp = Blueprint('documents', __name__)
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+@documents_bp.route('', methods=['POST'])
+@jwt_required()
+def upload_document():
+    try:
+        current_user_id = get_jwt_identity()
+        current_user = User.query.get(current_user_id)
+
+        if not current_user or current_user.role != 'issuer':
+            return jsonify({'error': 'Unauthorized. Only issuers can upload documents'}), 403
+
+        max_size = current_app.config['MAX_DOCUMENT_SIZE']
+        if request.content_length and request.content_length > max_size:
+            return jsonify({'error': f'Document exceeds the {max_size} byte limit'}), 413
+
+        # The raw request body is the document; it is hashed and written to disk chunk by chunk
+        store = current_app.extensions['document_store']
+        try:
+            digest, size = store.put_stream(request.stream, max_size=max_size)
+        except DocumentTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+
+        if size == 0:
+            return jsonify({'error': 'No document provided'}), 400
+
+        document = Document.query.get(digest)
+        created = document is None
+        if created:
+            document = Document(
+                digest=digest,
+                size=size,
+                content_type=request.mimetype or 'application/octet-stream',
+                filename=request.args.get('filename'),
+                uploaded_by=current_user_id
+            )
+            db.session.add(document)
+            db.session.commit()
+
+        return jsonify({
+            'message': 'Document uploaded successfully' if created else 'Document already stored',
+            'document': document.to_dict()
+        }), 201 if created else 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@documents_bp.route('/<digest>', methods=['GET'])
+def download_document(digest):
+    try:
+        if not DIGEST_PATTERN.match(digest):
+            return jsonify({'error': 'Document not found'}), 404
+
+        document = Document.query.get(digest)
+
+        if not document:
+            return jsonify({'error': 'Document not found'}), 404
+
+        store = current_app.extensions['document_store']
+
+        if hasattr(store, 'presigned_url'):
+            # Object stores serve ranges themselves
+            return redirect(store.presigned_url(digest))
+
+        # conditional=True answers Range and If-None-Match requests; the file is
+        # handed to the server's file wrapper (sendfile) rather than read into memory
+        return send_file(
+            store.path_for(digest),
+            mimetype=document.content_type,
+            download_name=document.filename or digest,
+            conditional=True,
+            etag=digest,
+            max_age=31536000
+        )
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,199 @@
+from web3 import HTTPProvider
+from web3.providers.base import JSONBaseProvider
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from collections import deque
+import random
+import threading
+import time
+
+# Sent to one node so nonces and pending transactions stay consistent; a
+# transaction just sent may not have reached the other nodes yet, so lookups
+# of it go to the node that accepted it
+STICKY_METHODS = {
+    'eth_sendRawTransaction',
+    'eth_sendTransaction',
+    'eth_getTransactionCount',
+    'eth_getTransactionByHash',
+    'eth_getTransactionReceipt',
+    'eth_accounts',
+    'eth_sign'
+}
+
+class Endpoint:
+    """One RPC URL with its observed latency and error rate"""
+
+    def __init__(self, url, timeout, failure_threshold=3, cooldown=30.0):
+        self.url = url
+        self.provider = HTTPProvider(url, request_kwargs={'timeout': timeout})
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency_ewma = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self._samples = deque(maxlen=200)
+        self._p95 = None
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self.requests += 1
+            self.error_rate = 0.9 * self.error_rate + (0.0 if ok else 0.1)
+            if ok:
+                self.consecutive_failures = 0
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+                self._samples.append(latency)
+                if len(self._samples) % 20 == 0:
+                    self._p95 = None
+            else:
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= self.failure_threshold:
+                    self.cooldown_until = time.monotonic() + self.cooldown
+
+    def available(self):
+        return time.monotonic() >= self.cooldown_until
+
+    def score(self):
+        """Expected cost of a request; lower is better"""
+        latency = self.latency_ewma if self.latency_ewma is not None else 0.05
+        return latency / max(1.0 - self.error_rate, 0.05)
+
+    def p95(self, default):
+        """95th percentile latency, once enough samples exist"""
+        if len(self._samples) < 20:
+            return default
+        if self._p95 is None:
+            samples = sorted(self._samples)
+            self._p95 = samples[int(len(samples) * 0.95) - 1]
+        return self._p95
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'requests': self.requests,
+            'latency_ms': round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'available': self.available()
+        }
+
+class RPCPoolProvider(JSONBaseProvider):
+    """web3 provider that spreads reads over several RPC endpoints
+
+    Reads go to the better of two randomly chosen endpoints by latency and
+    error rate. If a read has not answered within that endpoint's p95
+    latency, a duplicate is sent to the next best endpoint and the first
+    answer wins. Writes, nonce lookups and lookups of sent transactions stay
+    on one node.
+    """
+
+    def __init__(self, urls, timeout=10, hedge=True, default_hedge_delay=0.2):
+        super().__init__()
+        self.endpoints = [Endpoint(url, timeout) for url in urls]
+        self.hedge = hedge
+        self.default_hedge_delay = default_hedge_delay
+        self._sticky = 0
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __str__(self):
+        return f"RPC pool {[endpoint.url for endpoint in self.endpoints]}"
+
+    def make_request(self, method, params):
+        if method in STICKY_METHODS:
+            return self._request_sticky(method, params)
+        return self._request_read(method, params)
+
+    def stats(self):
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    def reset_after_fork(self):
+        """Drop the hedging executor inherited from the parent, whose threads did not survive the fork"""
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _call(self, endpoint, method, params):
+        started = time.monotonic()
+        try:
+            response = endpoint.provider.make_request(method, params)
+        except Exception:
+            endpoint.record(time.monotonic() - started, ok=False)
+            raise
+        # JSON-RPC errors such as reverts are answers, not endpoint failures
+        endpoint.record(time.monotonic() - started, ok=True)
+        return response
+
+    def _request_sticky(self, method, params):
+        last_error = None
+        for offset in range(len(self.endpoints)):
+            index = (self._sticky + offset) % len(self.endpoints)
+            try:
+                response = self._call(self.endpoints[index], method, params)
+                # Fail over permanently so later nonces come from the same node
+                self._sticky = index
+                return response
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def _ranked(self):
+        """Primary by power of two choices, then the rest by score"""
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.available()] or list(self.endpoints)
+        if len(candidates) > 1:
+            first, second = random.sample(candidates, 2)
+            primary = first if first.score() <= second.score() else second
+        else:
+            primary = candidates[0]
+        rest = sorted((endpoint for endpoint in candidates if endpoint is not primary), key=Endpoint.score)
+        return [primary] + rest
+
+    def _get_executor(self):
+        # Created on the first hedged read, which may run in a preforking
+        # master; workers call reset_after_fork to get their own
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=8 * len(self.endpoints), thread_name_prefix='rpc-hedge')
+        return self._executor
+
+    def _request_read(self, method, params):
+        ranked = self._ranked()
+        if not self.hedge or len(ranked) < 2:
+            return self._request_failover(ranked, method, params)
+
+        primary, backup = ranked[0], ranked[1]
+        executor = self._get_executor()
+        first = executor.submit(self._call, primary, method, params)
+
+        try:
+            return first.result(timeout=primary.p95(self.default_hedge_delay))
+        except FuturesTimeout:
+            pass
+        except Exception:
+            # Failed fast; no point racing it
+            return self._request_failover(ranked[1:], method, params)
+
+        second = executor.submit(self._call, backup, method, params)
+        last_error = None
+        for future in as_completed([first, second]):
+            try:
+                return future.result()
+            except Exception as e:
+                last_error = e
+        return self._request_failover(ranked[2:], method, params, last_error)
+
+    def _request_failover(self, endpoints, method, params, last_error=None):
+        for endpoint in endpoints:
+            try:
+                return self._call(endpoint, method, params)
+            except Exception as e:
+                last_error = e
+        if last_error is None:
+            raise ConnectionError("No RPC endpoint available")
+        raise last_error
+
+def create_provider(urls, timeout=10, hedge=True, default_hedge_delay=0.2):
+    """A plain HTTP provider for one URL, a pool for several"""
+    if len(urls) == 1:
+        return HTTPProvider(urls[0], request_kwargs={'timeout': timeout})
+    return RPCPoolProvider(urls, timeout=timeout, hedge=hedge, default_hedge_delay=default_hedge_delay)
@@ -0,0 +1,10 @@
+from fee_oracle import _length_bucket
+
+def test_length_bucket_counts_storage_slots():
+    assert _length_bucket('a' * 31) == 1
+    assert _length_bucket('a' * 32) == 1
+    assert _length_bucket('a' * 33) == 2
+
+def test_length_bucket_short_values_share_a_slot():
+    assert _length_bucket('') == 1
+    assert _length_bucket(b'\x00' * 64) == 2
@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import create_access_token, jwt_required
+
+from extensions import db, jwt
+from idempotency import idempotent
+from models import IdempotencyKey
+
+BODY = b'{"student_name": "Ada"}'
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        JWT_SECRET_KEY='test-secret-key-of-at-least-32-bytes',
+        IDEMPOTENCY_WAIT_TIMEOUT=0.5,
+        IDEMPOTENCY_LEASE_SECONDS=240
+    )
+    db.init_app(app)
+    jwt.init_app(app)
+    app.calls = 0
+
+    @app.route('/issue', methods=['POST'])
+    @jwt_required()
+    @idempotent
+    def issue():
+        app.calls += 1
+        return jsonify({'call': app.calls}), 201
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+def post(app, key):
+    token = create_access_token(identity='1')
+    headers = {
+        'Authorization': f'Bearer {token}',
+        'Idempotency-Key': key,
+        'Content-Type': 'application/json'
+    }
+    return app.test_client().post('/issue', data=BODY, headers=headers)
+
+def leave_in_progress(key, age):
+    """What a worker that died after claiming the key leaves behind"""
+    digest = hashlib.sha256()
+    for part in (b'POST', b'/issue', BODY):
+        digest.update(part)
+    db.session.add(IdempotencyKey(
+        user_id=1, key=key, fingerprint=digest.hexdigest(),
+        created_at=datetime.utcnow() - age
+    ))
+    db.session.commit()
+
+def test_retry_replays_stored_response(app):
+    assert post(app, 'k1').get_json() == {'call': 1}
+    replay = post(app, 'k1')
+    assert replay.status_code == 201
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert app.calls == 1
+
+def test_abandoned_key_is_taken_over_after_its_lease(app):
+    leave_in_progress('k2', age=timedelta(seconds=241))
+
+    response = post(app, 'k2')
+    assert response.status_code == 201
+    assert app.calls == 1
+    assert IdempotencyKey.query.get((1, 'k2')).status == 'completed'
+
+def test_in_progress_key_within_its_lease_is_not_taken_over(app):
+    leave_in_progress('k3', age=timedelta(seconds=10))
+
+    response = post(app, 'k3')
+    assert response.status_code == 409
+    assert app.calls == 0
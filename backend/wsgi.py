@@ -0,0 +1,30 @@
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+from sqlalchemy import text
+from app import app
+from extensions import db
+from lookup_filter import lookup_filter
+
+def warm_up():
+    """Prepare a freshly forked worker before it accepts requests"""
+    with app.app_context():
+        try:
+            db.session.execute(text('SELECT 1'))
+            db.session.remove()
+        except Exception as e:
+            print(f"Warning: Database warmup failed: {str(e)}")
+
+        try:
+            # Rows issued while the master was preloading
+            if lookup_filter.enabled:
+                lookup_filter.refresh()
+        except Exception as e:
+            print(f"Warning: Lookup filter warmup failed: {str(e)}")
+
+    from blockchain_utils import CONTRACT_ADDRESS, get_contract, fee_oracle
+    if CONTRACT_ADDRESS:
+        try:
+            get_contract()
+            fee_oracle.fee_params()
+        except Exception as e:
+            print(f"Warning: Blockchain warmup failed: {str(e)}")
@@ -9,18 +9,39 @@ contract CertificateVerification {
         string courseName;
         string issueDate;
         uint256 timestamp;
+        uint256 serial;
         bool exists;
     }
     
+    address public owner;
     mapping(string => Certificate) public certificates;
     string[] public certificateHashes;
     
+    // Revocation bitmap keyed by certificate serial: word = serial / 256, bit = serial % 256
+    mapping(uint256 => uint256) private revocationBitmap;
+    uint256 public revocationEpoch;
+    
     event CertificateIssued(
         string indexed certificateId,
         string indexed hash,
-        string studentName
+        string studentName,
+        uint256 serial
+    );
+    
+    event CertificatesRevoked(
+        uint256 indexed epoch,
+        uint256[] serials
     );
     
+    modifier onlyOwner() {
+        require(msg.sender == owner, "Only the contract owner can perform this action");
+        _;
+    }
+    
+    constructor() {
+        owner = msg.sender;
+    }
+    
     function issueCertificate(
         string memory _certificateId,
         string memory _hash,
@@ -30,6 +51,8 @@ contract CertificateVerification {
     ) public {
         require(!certificates[_hash].exists, "Certificate with this hash already exists");
         
+        uint256 serial = certificateHashes.length;
+        
         certificates[_hash] = Certificate({
             certificateId: _certificateId,
             hash: _hash,
@@ -37,16 +60,63 @@ contract CertificateVerification {
             courseName: _courseName,
             issueDate: _issueDate,
             timestamp: block.timestamp,
+            serial: serial,
             exists: true
         });
         
         certificateHashes.push(_hash);
         
-        emit CertificateIssued(_certificateId, _hash, _studentName);
+        emit CertificateIssued(_certificateId, _hash, _studentName, serial);
+    }
+    
+    function revokeCertificates(uint256[] calldata _serials) external onlyOwner {
+        require(_serials.length > 0, "No certificates to revoke");
+        
+        // Accumulate bits for consecutive serials in the same word so sorted
+        // batches cost one storage write per 256 certificates
+        uint256 wordIndex = _serials[0] >> 8;
+        uint256 mask = 0;
+        
+        for (uint256 i = 0; i < _serials.length; i++) {
+            uint256 serial = _serials[i];
+            require(serial < certificateHashes.length, "Certificate not found");
+            
+            if ((serial >> 8) != wordIndex) {
+                revocationBitmap[wordIndex] |= mask;
+                wordIndex = serial >> 8;
+                mask = 0;
+            }
+            mask |= uint256(1) << (serial & 0xff);
+        }
+        revocationBitmap[wordIndex] |= mask;
+        
+        revocationEpoch += 1;
+        emit CertificatesRevoked(revocationEpoch, _serials);
+    }
+    
+    function isRevoked(uint256 _serial) public view returns (bool) {
+        return (revocationBitmap[_serial >> 8] >> (_serial & 0xff)) & 1 == 1;
+    }
+    
+    function getRevocationWord(uint256 _wordIndex) public view returns (uint256) {
+        return revocationBitmap[_wordIndex];
     }
     
     function verifyCertificate(string memory _hash) public view returns (bool) {
-        return certificates[_hash].exists;
+        Certificate storage cert = certificates[_hash];
+        return cert.exists && !isRevoked(cert.serial);
+    }
+    
+    function checkCertificate(string memory _hash) public view returns (
+        bool exists,
+        bool revoked,
+        uint256 serial
+    ) {
+        Certificate storage cert = certificates[_hash];
+        if (!cert.exists) {
+            return (false, false, 0);
+        }
+        return (true, isRevoked(cert.serial), cert.serial);
     }
     
     function getCertificate(string memory _hash) public view returns (
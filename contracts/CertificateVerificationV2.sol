@@ -0,0 +1,138 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+contract CertificateVerificationV2 {
+    // Record layout (one storage slot per certificate):
+    //   bits   0..159  issuer address
+    //   bits 160..199  block timestamp
+    //   bits 200..247  serial
+    //   bits 248..255  flags (bit 0 = exists)
+    uint256 private constant TIMESTAMP_SHIFT = 160;
+    uint256 private constant SERIAL_SHIFT = 200;
+    uint256 private constant FLAGS_SHIFT = 248;
+    uint256 private constant FLAG_EXISTS = 1;
+
+    address public owner;
+    mapping(bytes32 => uint256) private records;
+    uint256 public totalCertificates;
+
+    // Revocation bitmap keyed by certificate serial: word = serial / 256, bit = serial % 256
+    mapping(uint256 => uint256) private revocationBitmap;
+    uint256 public revocationEpoch;
+
+    // Descriptive fields live only in the event log
+    event CertificateIssued(
+        bytes32 indexed hash,
+        uint256 indexed serial,
+        string certificateId,
+        string studentName,
+        string courseName,
+        string issueDate
+    );
+
+    event CertificatesRevoked(
+        uint256 indexed epoch,
+        uint256[] serials
+    );
+
+    modifier onlyOwner() {
+        require(msg.sender == owner, "Only the contract owner can perform this action");
+        _;
+    }
+
+    constructor() {
+        owner = msg.sender;
+    }
+
+    function issueCertificate(
+        bytes32 _hash,
+        string calldata _certificateId,
+        string calldata _studentName,
+        string calldata _courseName,
+        string calldata _issueDate
+    ) external {
+        require(records[_hash] == 0, "Certificate with this hash already exists");
+
+        uint256 serial = totalCertificates;
+        records[_hash] = uint256(uint160(msg.sender))
+            | (uint256(uint40(block.timestamp)) << TIMESTAMP_SHIFT)
+            | (serial << SERIAL_SHIFT)
+            | (FLAG_EXISTS << FLAGS_SHIFT);
+        totalCertificates = serial + 1;
+
+        emit CertificateIssued(_hash, serial, _certificateId, _studentName, _courseName, _issueDate);
+    }
+
+    function revokeCertificates(uint256[] calldata _serials) external onlyOwner {
+        require(_serials.length > 0, "No certificates to revoke");
+
+        // Accumulate bits for consecutive serials in the same word so sorted
+        // batches cost one storage write per 256 certificates
+        uint256 wordIndex = _serials[0] >> 8;
+        uint256 mask = 0;
+
+        for (uint256 i = 0; i < _serials.length; i++) {
+            uint256 serial = _serials[i];
+            require(serial < totalCertificates, "Certificate not found");
+
+            if ((serial >> 8) != wordIndex) {
+                revocationBitmap[wordIndex] |= mask;
+                wordIndex = serial >> 8;
+                mask = 0;
+            }
+            mask |= uint256(1) << (serial & 0xff);
+        }
+        revocationBitmap[wordIndex] |= mask;
+
+        revocationEpoch += 1;
+        emit CertificatesRevoked(revocationEpoch, _serials);
+    }
+
+    function isRevoked(uint256 _serial) public view returns (bool) {
+        return (revocationBitmap[_serial >> 8] >> (_serial & 0xff)) & 1 == 1;
+    }
+
+    function getRevocationWord(uint256 _wordIndex) external view returns (uint256) {
+        return revocationBitmap[_wordIndex];
+    }
+
+    function verifyCertificate(bytes32 _hash) external view returns (bool) {
+        uint256 record = records[_hash];
+        return record != 0 && !isRevoked((record >> SERIAL_SHIFT) & 0xffffffffffff);
+    }
+
+    function checkCertificate(bytes32 _hash) external view returns (
+        bool exists,
+        bool revoked,
+        uint256 serial
+    ) {
+        uint256 record = records[_hash];
+        if (record == 0) {
+            return (false, false, 0);
+        }
+        serial = (record >> SERIAL_SHIFT) & 0xffffffffffff;
+        return (true, isRevoked(serial), serial);
+    }
+
+    function getCertificate(bytes32 _hash) external view returns (
+        address issuer,
+        uint256 timestamp,
+        uint256 serial,
+        bool revoked
+    ) {
+        uint256 record = records[_hash];
+        require(record != 0, "Certificate not found");
+
+        serial = (record >> SERIAL_SHIFT) & 0xffffffffffff;
+        return (
+            address(uint160(record)),
+            (record >> TIMESTAMP_SHIFT) & 0xffffffffff,
+            serial,
+            isRevoked(serial)
+        );
+    }
+
+    function getTotalCertificates() external view returns (uint256) {
+        return totalCertificates;
+    }
+}
@@ -3,6 +3,12 @@ import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import api from '../services/api';
 
+// crypto.randomUUID is only available over HTTPS; getRandomValues works everywhere
+const newIdempotencyKey = () => {
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('');
+};
+
 const IssueCertificate = () => {
   const { isIssuer } = useAuth();
   const [users, setUsers] = useState([]);
@@ -17,6 +23,8 @@ const IssueCertificate = () => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
+  // Retrying the same form reuses the key, so a timed-out request is never issued twice
+  const [idempotencyKey, setIdempotencyKey] = useState(newIdempotencyKey);
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -41,6 +49,7 @@ const IssueCertificate = () => {
       ...formData,
       [e.target.name]: e.target.value
     });
+    setIdempotencyKey(newIdempotencyKey());
   };
 
   const handleSubmit = async (e) => {
@@ -50,7 +59,9 @@ const IssueCertificate = () => {
     setLoading(true);
 
     try {
-      const response = await api.post('/api/certificates/issue', formData);
+      const response = await api.post('/api/certificates/issue', formData, {
+        headers: { 'Idempotency-Key': idempotencyKey }
+      });
       setSuccess('Certificate issued successfully!');
       setTimeout(() => {
         navigate(`/certificate/${response.data.certificate.certificate_id}`);
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Script to check batched revocation and the local revocation mirror on an in-process EVM
+
+Deploys each contract version with eth-tester (requires
+`pip install "eth-tester[py-evm]"`), issues certificates, revokes them in
+batches from two simulated workers and checks that checkCertificate,
+isRevoked, verifyCertificate and every worker's RevocationMirror agree.
+Run from the repository root; exits non-zero on the first mismatch.
+"""
+import sys
+import os
+from web3 import Web3
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from revocation import RevocationMirror
+from gas_benchmark import deploy, sample_certificates
+
+def fail(message):
+    print(f"FAILED: {message}")
+    sys.exit(1)
+
+def issue_all(w3, contract, version, count):
+    """Issue `count` certificates and return their contract keys indexed by serial"""
+    sender = {'from': w3.eth.accounts[0]}
+    keys = []
+
+    for certificate_id, certificate_hash, student_name, course_name, issue_date in sample_certificates(count):
+        if version >= 2:
+            key = bytes.fromhex(certificate_hash)
+            call = contract.functions.issueCertificate(key, certificate_id, student_name, course_name, issue_date)
+        else:
+            key = certificate_hash
+            call = contract.functions.issueCertificate(certificate_id, certificate_hash, student_name, course_name, issue_date)
+
+        receipt = w3.eth.wait_for_transaction_receipt(call.transact(sender))
+        serial = contract.events.CertificateIssued().process_receipt(receipt)[0]['args']['serial']
+        if serial != len(keys):
+            fail(f"v{version}: expected serial {len(keys)}, event reported {serial}")
+        keys.append(key)
+
+    return keys
+
+def revoke(w3, contract, serials, sender=None):
+    """Send one revokeCertificates batch and return the epoch it produced"""
+    tx_hash = contract.functions.revokeCertificates(serials).transact({'from': sender or w3.eth.accounts[0]})
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    return contract.events.CertificatesRevoked().process_receipt(receipt)[0]['args']['epoch']
+
+def expect_revert(description, send):
+    try:
+        send()
+    except Exception:
+        return
+    fail(f"{description} did not revert")
+
+def check_agreement(contract, version, keys, revoked, mirrors):
+    for serial, key in enumerate(keys):
+        expected = serial in revoked
+        exists, chain_revoked, chain_serial = contract.functions.checkCertificate(key).call()
+
+        if not exists or chain_serial != serial:
+            fail(f"v{version}: checkCertificate lost serial {serial}")
+        if chain_revoked != expected or contract.functions.isRevoked(serial).call() != expected:
+            fail(f"v{version}: serial {serial} revoked on chain is {chain_revoked}, expected {expected}")
+        if contract.functions.verifyCertificate(key).call() == expected:
+            fail(f"v{version}: verifyCertificate disagrees with revocation of serial {serial}")
+        for name, mirror in mirrors.items():
+            if mirror.is_revoked(serial) != expected:
+                fail(f"v{version}: mirror of {name} has serial {serial} revoked={mirror.is_revoked(serial)}, expected {expected}")
+
+def run(w3, version, count):
+    contract, _ = deploy(w3, version)
+    keys = issue_all(w3, contract, version, count)
+
+    workers = {'worker-a': RevocationMirror(), 'worker-b': RevocationMirror()}
+    for mirror in workers.values():
+        mirror.sync(contract)
+    revoked = set()
+
+    # Batches straddle bitmap word boundaries and arrive unsorted
+    batches = [
+        ('worker-a', [0, 5, 255, 256]),
+        ('worker-b', [count - 1, 1, 257]),
+        ('worker-a', [300, 2, 511, 512])
+    ]
+
+    for name, serials in batches:
+        serials = [serial for serial in serials if serial < count]
+        epoch = revoke(w3, contract, serials)
+        workers[name].mark_revoked(serials, epoch=epoch)
+        revoked.update(serials)
+
+    # worker-a skipped worker-b's epoch, so it must not consider itself current
+    if workers['worker-a'].epoch == contract.functions.revocationEpoch().call():
+        fail(f"v{version}: mirror advanced its epoch over another worker's revocation")
+
+    for mirror in workers.values():
+        mirror.sync(contract)
+    check_agreement(contract, version, keys, revoked, workers)
+
+    # A synced mirror makes no further word reads while the epoch is unchanged
+    if workers['worker-a'].sync(contract) != len(batches):
+        fail(f"v{version}: unexpected revocation epoch after {len(batches)} batches")
+
+    expect_revert("revoking an unissued serial", lambda: revoke(w3, contract, [count]))
+    expect_revert("revoking from a non-owner account", lambda: revoke(w3, contract, [3], sender=w3.eth.accounts[1]))
+
+    print(f"v{version}: {count} certificates, {len(revoked)} revoked in {len(batches)} batches; chain and mirrors agree")
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check contract revocation and the revocation mirror on eth-tester')
+    parser.add_argument('--count', type=int, default=600, help='Certificates to issue per contract')
+    parser.add_argument('--version', type=int, choices=[1, 2], help='Only check one contract version')
+
+    args = parser.parse_args()
+
+    w3 = Web3(Web3.EthereumTesterProvider())
+    for version in ([args.version] if args.version else [1, 2]):
+        run(w3, version, args.count)
@@ -3,11 +3,15 @@
 Script to deploy the CertificateVerification smart contract to Ethereum network
 """
 import os
+import sys
 import json
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
 from solcx import compile_source, install_solc
 from dotenv import load_dotenv
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from confirmations import ConfirmationTracker
 
 load_dotenv()
 
@@ -15,13 +19,22 @@ load_dotenv()
 ETHEREUM_RPC_URL = os.getenv('ETHEREUM_RPC_URL', 'http://localhost:8545')
 PRIVATE_KEY = os.getenv('PRIVATE_KEY', '')
 ACCOUNT_ADDRESS = os.getenv('ACCOUNT_ADDRESS', '')
+CONFIRMATION_DEPTH = int(os.getenv('CONFIRMATION_DEPTH', '1'))
+
+# Contract versions: source file and contract name
+CONTRACTS = {
+    1: ('contracts/CertificateVerification.sol', 'CertificateVerification'),
+    2: ('contracts/CertificateVerificationV2.sol', 'CertificateVerificationV2')
+}
 
-def compile_contract():
+def compile_contract(version=1):
     """Compile the Solidity contract"""
     print("Compiling smart contract...")
     
+    source_path, contract_name = CONTRACTS[version]
+    
     # Read the contract source code
-    with open('contracts/CertificateVerification.sol', 'r') as f:
+    with open(source_path, 'r') as f:
         contract_source = f.read()
     
     # Install Solidity compiler if needed
@@ -32,11 +45,11 @@ def compile_contract():
     
     # Compile the contract
     compiled_sol = compile_source(contract_source, solc_version='0.8.0')
-    contract_interface = compiled_sol['<stdin>:CertificateVerification']
+    contract_interface = compiled_sol[f'<stdin>:{contract_name}']
     
     return contract_interface
 
-def deploy_contract():
+def deploy_contract(version=1):
     """Deploy the contract to the blockchain"""
     print("Connecting to Ethereum network...")
     
@@ -59,7 +72,7 @@ def deploy_contract():
             print("Warning: Account has zero balance. You may need to fund it.")
     
     # Compile contract
-    contract_interface = compile_contract()
+    contract_interface = compile_contract(version)
     
     # Get contract class
     CertificateVerification = w3.eth.contract(
@@ -85,22 +98,26 @@ def deploy_contract():
         signed_txn = w3.eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
         
         # Send transaction
+        submitted_block = w3.eth.block_number
         tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
         print(f"Transaction hash: {tx_hash.hex()}")
         
         # Wait for receipt
-        print("Waiting for transaction confirmation...")
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        print(f"Waiting for {CONFIRMATION_DEPTH} confirmation(s)...")
+        tracker = ConfirmationTracker(w3, depth=CONFIRMATION_DEPTH)
+        tx_receipt = tracker.track(tx_hash, sender=ACCOUNT_ADDRESS, nonce=nonce, submitted_block=submitted_block).wait(timeout=600)
         
         contract_address = tx_receipt.contractAddress
         print(f"Contract deployed at address: {contract_address}")
         
     else:
         # For local development with Ganache
+        submitted_block = w3.eth.block_number
         transaction_hash = CertificateVerification.constructor().transact({
             'from': w3.eth.accounts[0]
         })
-        tx_receipt = w3.eth.wait_for_transaction_receipt(transaction_hash)
+        tracker = ConfirmationTracker(w3, depth=CONFIRMATION_DEPTH)
+        tx_receipt = tracker.track(transaction_hash, submitted_block=submitted_block).wait(timeout=600)
         contract_address = tx_receipt.contractAddress
         print(f"Contract deployed at address: {contract_address}")
     
@@ -108,7 +125,9 @@ def deploy_contract():
     contract_info = {
         'address': contract_address,
         'abi': contract_interface['abi'],
-        'transaction_hash': tx_receipt.transactionHash.hex()
+        'transaction_hash': tx_receipt.transactionHash.hex(),
+        'block_number': tx_receipt.blockNumber,
+        'version': version
     }
     
     with open('contracts/contract_info.json', 'w') as f:
@@ -122,8 +141,16 @@ def deploy_contract():
     return contract_address, contract_interface['abi']
 
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Deploy the CertificateVerification contract')
+    parser.add_argument('--version', type=int, choices=sorted(CONTRACTS), default=1,
+                        help='Contract version (2 = bytes32-keyed, lower gas)')
+    
+    args = parser.parse_args()
+    
     try:
-        deploy_contract()
+        deploy_contract(args.version)
     except Exception as e:
         print(f"Error deploying contract: {str(e)}")
         import traceback
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script to export issued certificates as CSV or NDJSON for offline audits
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Skip the lookup filter scan and revocation sync the API server needs at startup
+os.environ.setdefault('STARTUP_TASKS_ENABLED', 'false')
+from app import app
+from export import iter_export, EXPORT_FORMATS
+
+def export_certificates(output, export_format, issuer_id=None, cursor=0, compress=False):
+    """Stream certificates to a file without loading them into memory"""
+    with app.app_context():
+        written = 0
+        for chunk in iter_export(export_format, issuer_id=issuer_id, after_id=cursor, compress=compress):
+            output.write(chunk)
+            written += len(chunk)
+        return written
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export issued certificates')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv', help='Output format')
+    parser.add_argument('--issuer-id', type=int, help='Only export certificates issued by this user')
+    parser.add_argument('--cursor', type=int, default=0, help='Resume after this certificate row id')
+    parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+    parser.add_argument('--output', type=str, help='Output file (default: stdout)')
+
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, 'wb') as f:
+            written = export_certificates(f, args.format, args.issuer_id, args.cursor, args.gzip)
+        print(f"Exported {written} bytes to {args.output}", file=sys.stderr)
+    else:
+        export_certificates(sys.stdout.buffer, args.format, args.issuer_id, args.cursor, args.gzip)
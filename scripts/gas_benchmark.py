@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Script to compare gas usage of the v1 and v2 certificate contracts on a local EVM
+
+Runs against a local node with unlocked accounts (Ganache, Anvil, Hardhat) or,
+with --tester, an in-process EVM (requires `pip install "eth-tester[py-evm]"`).
+Run from the repository root.
+"""
+import sys
+import hashlib
+from statistics import mean
+from web3 import Web3
+
+from deploy_contract import compile_contract, ETHEREUM_RPC_URL
+
+def deploy(w3, version):
+    """Deploy one contract version from the first unlocked account"""
+    contract_interface = compile_contract(version)
+    factory = w3.eth.contract(abi=contract_interface['abi'], bytecode=contract_interface['bin'])
+    tx_hash = factory.constructor().transact({'from': w3.eth.accounts[0]})
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    return w3.eth.contract(address=receipt.contractAddress, abi=contract_interface['abi']), receipt.gasUsed
+
+def sample_certificates(count):
+    for i in range(count):
+        certificate_hash = hashlib.sha256(f'benchmark-{i}'.encode()).hexdigest()
+        yield (
+            f'00000000-0000-4000-8000-{i:012d}',
+            certificate_hash,
+            f'Student Number {i} With A Reasonably Long Name',
+            'Bachelor of Science in Computer Science and Engineering',
+            '2024-06-30'
+        )
+
+def benchmark(w3, version, count):
+    """Measure deploy, issue, read and batch revoke gas for one contract version"""
+    contract, deploy_gas = deploy(w3, version)
+    sender = {'from': w3.eth.accounts[0]}
+    issue_gas = []
+    read_gas = []
+
+    for certificate_id, certificate_hash, student_name, course_name, issue_date in sample_certificates(count):
+        if version >= 2:
+            key = bytes.fromhex(certificate_hash)
+            call = contract.functions.issueCertificate(key, certificate_id, student_name, course_name, issue_date)
+        else:
+            key = certificate_hash
+            call = contract.functions.issueCertificate(certificate_id, certificate_hash, student_name, course_name, issue_date)
+
+        receipt = w3.eth.wait_for_transaction_receipt(call.transact(sender))
+        issue_gas.append(receipt.gasUsed)
+        read_gas.append(contract.functions.getCertificate(key).estimate_gas())
+
+    revoke_receipt = w3.eth.wait_for_transaction_receipt(
+        contract.functions.revokeCertificates(list(range(count))).transact(sender)
+    )
+
+    return {
+        'deploy': deploy_gas,
+        'issue': mean(issue_gas),
+        'getCertificate': mean(read_gas),
+        'revoke_batch': revoke_receipt.gasUsed
+    }
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare gas usage of contract v1 and v2')
+    parser.add_argument('--count', type=int, default=50, help='Certificates to issue per contract')
+    parser.add_argument('--tester', action='store_true', help='Use an in-process EVM instead of ETHEREUM_RPC_URL')
+
+    args = parser.parse_args()
+
+    if args.tester:
+        w3 = Web3(Web3.EthereumTesterProvider())
+    else:
+        w3 = Web3(Web3.HTTPProvider(ETHEREUM_RPC_URL))
+        if not w3.is_connected():
+            print(f"Error: Cannot connect to {ETHEREUM_RPC_URL}")
+            sys.exit(1)
+
+    results = {version: benchmark(w3, version, args.count) for version in (1, 2)}
+
+    print(f"\nGas usage over {args.count} certificates")
+    print(f"{'metric':<16}{'v1':>12}{'v2':>12}{'saving':>10}")
+    for metric in ('deploy', 'issue', 'getCertificate', 'revoke_batch'):
+        v1, v2 = results[1][metric], results[2][metric]
+        print(f"{metric:<16}{v1:>12,.0f}{v2:>12,.0f}{(1 - v2 / v1):>10.1%}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Script to reconcile certificate rows in the database with the blockchain
+"""
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Skip the lookup filter scan and revocation sync the API server needs at startup
+os.environ.setdefault('STARTUP_TASKS_ENABLED', 'false')
+from app import app
+from reconcile import reconcile
+
+def run_once(args):
+    """Run one reconciliation pass and write the diff report"""
+    def progress(report):
+        print(f"Scanned {report['scanned']} certificates...", file=sys.stderr)
+
+    with app.app_context():
+        report = reconcile(
+            page_size=args.page_size,
+            concurrency=args.concurrency,
+            repair=not args.dry_run,
+            max_retries=args.max_retries,
+            use_event_index=args.event_index,
+            from_block=args.from_block,
+            progress=progress
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    print(f"Reconciliation finished: {report['scanned']} scanned, "
+          f"{len(report['missing_on_chain'])} missing on chain, "
+          f"{len(report['recovered'])} recovered, {len(report['retried'])} re-anchored", file=sys.stderr)
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Reconcile database certificates with the blockchain')
+    parser.add_argument('--page-size', type=int, default=1000, help='Certificates per keyset page')
+    parser.add_argument('--concurrency', type=int, default=8, help='Maximum concurrent RPC calls')
+    parser.add_argument('--max-retries', type=int, default=100, help='Maximum failed anchors to resubmit per run')
+    parser.add_argument('--event-index', action='store_true', help='Check hashes against CertificateIssued logs instead of one call per certificate')
+    parser.add_argument('--from-block', type=int, default=0, help='First block to index when using --event-index')
+    parser.add_argument('--dry-run', action='store_true', help='Report differences without resubmitting anything')
+    parser.add_argument('--report', type=str, help='Write the JSON diff report to this file (default: stdout)')
+    parser.add_argument('--interval', type=int, help='Run continuously, every INTERVAL seconds')
+
+    args = parser.parse_args()
+
+    if args.interval:
+        # Scheduled mode, e.g. as a separate container or systemd service
+        while True:
+            try:
+                run_once(args)
+            except Exception as e:
+                print(f"Error during reconciliation: {str(e)}", file=sys.stderr)
+            time.sleep(args.interval)
+    else:
+        run_once(args)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Script to exercise the RPC pool against local fake JSON-RPC servers
+
+Starts one fake node per --latencies entry (milliseconds, with optional
+jitter and error rate), sends reads through the pool and prints latency
+percentiles and per-endpoint traffic, next to a single-endpoint baseline.
+"""
+import sys
+import os
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from rpc_pool import RPCPoolProvider
+from web3 import HTTPProvider
+
+def start_fake_node(latency, jitter, error_rate):
+    """Serve eth_blockNumber/eth_call with the given latency on a free port"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            # Heavy-tailed delays: occasionally ten times slower than usual
+            delay = latency * (10 if random.random() < jitter else 1)
+            time.sleep(delay)
+
+            if random.random() < error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            result = '0x10' if request['method'] == 'eth_blockNumber' else '0x'
+            body = json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': result}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+def measure(provider, count):
+    latencies = []
+    errors = 0
+    for _ in range(count):
+        started = time.monotonic()
+        try:
+            provider.make_request('eth_blockNumber', [])
+        except Exception:
+            errors += 1
+        latencies.append(time.monotonic() - started)
+    latencies.sort()
+    return {
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': errors
+    }
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the RPC pool against fake nodes')
+    parser.add_argument('--latencies', type=str, default='20,50,150', help='Per-node latency in ms, comma-separated')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Fraction of requests that are 10x slower')
+    parser.add_argument('--error-rate', type=float, default=0.01, help='Fraction of requests answered with HTTP 503')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per run')
+
+    args = parser.parse_args()
+
+    urls = [start_fake_node(int(ms) / 1000, args.jitter, args.error_rate) for ms in args.latencies.split(',')]
+
+    baseline = measure(HTTPProvider(urls[0]), args.requests)
+    pool = RPCPoolProvider(urls)
+    pooled = measure(pool, args.requests)
+
+    print(f"{'':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in (('single', baseline), ('pool', pooled)):
+        print(f"{name:<10}{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}{result['errors']:>8}")
+
+    print("\nPer-endpoint traffic:")
+    for stats in pool.stats():
+        print(f"  {stats['url']}: {stats['requests']} requests, {stats['latency_ms']} ms avg, error rate {stats['error_rate']}")
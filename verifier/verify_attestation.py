@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Standalone verifier for Certificate Vault attestations
+
+Checks a signed attestation offline against the issuer's published signer
+address, and optionally against the certificate contract on chain. Depends
+only on eth-account; the on-chain check additionally needs web3.
+
+Usage as a library:
+
+    from verify_attestation import verify_attestation, check_on_chain
+    claims = verify_attestation(token, signer='0x...')
+    check_on_chain(claims, rpc_url='https://...')
+
+Usage from the command line:
+
+    python verify_attestation.py TOKEN --signer 0x...
+    python verify_attestation.py TOKEN --key-url https://api.example.com/api/certificates/attestation-key --rpc-url https://...
+"""
+import sys
+import base64
+import binascii
+import json
+import time
+import urllib.request
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+SUPPORTED_VERSIONS = {1}
+
+# Just the view functions the on-chain check needs
+_EPOCH_ABI = {
+    'inputs': [],
+    'name': 'revocationEpoch',
+    'outputs': [{'name': '', 'type': 'uint256'}],
+    'stateMutability': 'view',
+    'type': 'function'
+}
+
+def _check_certificate_abi(hash_type):
+    return {
+        'inputs': [{'name': '_hash', 'type': hash_type}],
+        'name': 'checkCertificate',
+        'outputs': [
+            {'name': 'exists', 'type': 'bool'},
+            {'name': 'revoked', 'type': 'bool'},
+            {'name': 'serial', 'type': 'uint256'}
+        ],
+        'stateMutability': 'view',
+        'type': 'function'
+    }
+
+class AttestationError(Exception):
+    """The attestation is malformed, forged, expired or contradicted by the chain"""
+
+def _strip_hex(value):
+    return value[2:].lower() if value.startswith('0x') else value.lower()
+
+def _b64decode(value):
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+def decode_attestation(token):
+    """Split a token into (claims, payload bytes, signature) without checking it"""
+    try:
+        payload_part, signature_part = token.strip().split('.')
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+        claims = json.loads(payload)
+    except (ValueError, binascii.Error) as e:
+        raise AttestationError(f"Malformed attestation: {str(e)}")
+    if not isinstance(claims, dict):
+        raise AttestationError("Malformed attestation: claims must be an object")
+    return claims, payload, signature
+
+def verify_attestation(token, signer, certificate_hash=None, now=None):
+    """Check signature, version and expiry offline; returns the claims
+
+    Pass certificate_hash to also make sure the attestation is about the
+    certificate at hand rather than some other valid one.
+    """
+    claims, payload, signature = decode_attestation(token)
+
+    if claims.get('v') not in SUPPORTED_VERSIONS:
+        raise AttestationError(f"Unsupported attestation version {claims.get('v')}")
+
+    try:
+        recovered = Account.recover_message(encode_defunct(primitive=payload), signature=signature)
+    except Exception as e:
+        raise AttestationError(f"Invalid signature: {str(e)}")
+    if recovered.lower() != signer.lower():
+        raise AttestationError(f"Signed by {recovered}, expected {signer}")
+
+    now = int(time.time()) if now is None else now
+    if now >= claims['exp']:
+        raise AttestationError("Attestation has expired")
+
+    if certificate_hash and _strip_hex(certificate_hash) != _strip_hex(claims['certificate_hash']):
+        raise AttestationError("Attestation is for a different certificate")
+
+    return claims
+
+def check_on_chain(claims, rpc_url):
+    """Confirm the claims against the contract; returns a short status dict
+
+    When the contract's revocation epoch still equals the attested one,
+    nothing has been revoked since signing and no per-certificate lookup is
+    needed.
+    """
+    from web3 import Web3
+
+    if not claims.get('contract'):
+        raise AttestationError("Attestation names no contract; it was issued without a blockchain")
+
+    w3 = Web3(Web3.HTTPProvider(rpc_url))
+
+    if claims.get('chain_id') is not None and w3.eth.chain_id != claims['chain_id']:
+        raise AttestationError(f"RPC endpoint is on chain {w3.eth.chain_id}, attestation is for chain {claims['chain_id']}")
+
+    address = Web3.to_checksum_address(claims['contract'])
+    receipt = w3.eth.get_transaction_receipt(claims['tx_hash'])
+    if receipt['status'] != 1 or receipt['blockNumber'] != claims['block_number'] or receipt['to'] != address:
+        raise AttestationError("Issuing transaction does not match the attestation")
+
+    if claims.get('contract_version', 1) >= 2:
+        hash_type, hash_arg = 'bytes32', bytes.fromhex(_strip_hex(claims['certificate_hash']))
+    else:
+        hash_type, hash_arg = 'string', claims['certificate_hash']
+    contract = w3.eth.contract(address=address, abi=[_EPOCH_ABI, _check_certificate_abi(hash_type)])
+
+    epoch = contract.functions.revocationEpoch().call()
+    if epoch == claims['revocation_epoch']:
+        return {'exists': True, 'revoked': False, 'epoch': epoch, 'lookup': 'epoch'}
+
+    exists, revoked, _ = contract.functions.checkCertificate(hash_arg).call()
+    if not exists:
+        raise AttestationError("Certificate is not on chain")
+    if revoked:
+        raise AttestationError("Certificate has been revoked on chain")
+    return {'exists': True, 'revoked': False, 'epoch': epoch, 'lookup': 'certificate'}
+
+def fetch_signer(key_url):
+    """Read the signer address from the issuer's published attestation key"""
+    with urllib.request.urlopen(key_url, timeout=10) as response:
+        return json.loads(response.read())['signer']
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Verify a certificate attestation offline')
+    parser.add_argument('token', help='Attestation token, or - to read it from stdin')
+    signer_group = parser.add_mutually_exclusive_group(required=True)
+    signer_group.add_argument('--signer', type=str, help='Published signer address')
+    signer_group.add_argument('--key-url', type=str, help='URL of the issuer\'s /api/certificates/attestation-key')
+    parser.add_argument('--certificate-hash', type=str, help='Require the attestation to be for this certificate hash')
+    parser.add_argument('--rpc-url', type=str, help='Also check the certificate on chain through this RPC endpoint')
+
+    args = parser.parse_args()
+
+    token = sys.stdin.read() if args.token == '-' else args.token
+    signer = args.signer or fetch_signer(args.key_url)
+
+    try:
+        claims = verify_attestation(token, signer, certificate_hash=args.certificate_hash)
+        print(f"Signature valid (signer {signer})")
+        print(json.dumps(claims, indent=2, sort_keys=True))
+
+        if args.rpc_url:
+            result = check_on_chain(claims, args.rpc_url)
+            print(f"On-chain check passed (revocation epoch {result['epoch']}, {result['lookup']} lookup)")
+    except AttestationError as e:
+        print(f"Invalid attestation: {str(e)}")
+        sys.exit(1)